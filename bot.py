@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 import os
 import asyncio
+import signal
 
 # Bot setup
 intents = discord.Intents.default()
@@ -110,8 +111,19 @@ async def main():
         return
     
     async with bot:
+        # Procfile workers are stopped with SIGTERM; close the bot so every cog's unload can save its pending writes
+        closing = []
+        try:
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGTERM, lambda: closing.append(asyncio.create_task(bot.close()))
+            )
+        except NotImplementedError:
+            pass  # No loop signal handlers on Windows
+        
         await load_extensions()
         await bot.start(TOKEN)
+        for task in closing:
+            await task
 
 # Entry point
 if __name__ == "__main__":
@@ -1,30 +1,61 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import aiohttp
-from bs4 import BeautifulSoup
 import asyncio
 from typing import List, Dict
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from urllib.parse import urlsplit
+import json
+import os
+import random
 import re
+import time
+from utils import tiktok_profile
+from utils.files import write_atomic
+from utils.stats_history import StatsHistory
+from utils.trend import RollingTrend
+from utils.ratelimit import TokenBucket
 
 class TikTokGoal:
     def __init__(self, description: str, stat_type: str, milestones: List[int]):
         self.description = description
         self.stat_type = stat_type
-        self.milestones = sorted(milestones)
-        self.current_milestone_index = -1
-        self.completed_milestones = []
+        # Sorted, de-duplicated ladder, so updates can bisect it. Repeated milestones no longer
+        # count towards indexes, which is the one deliberate change from the old list engine
+        self.milestones = array('q', sorted(set(milestones)))
+        self.completed_bits = 0  # Bit i is set once milestones[i] has been reached
+        self.high_water = 0  # Number of milestones up to and including the highest one reached
+
+    @classmethod
+    def ladder(cls, description: str, stat_type: str, step: int, maximum: int, start: int = None):
+        """A goal with a milestone every `step` up to `maximum`, e.g. every 1,000 up to 10M"""
+        return cls(description, stat_type, range(start or step, maximum + 1, step))
+
+    @property
+    def current_milestone_index(self) -> int:
+        return self.high_water - 1
+
+    @property
+    def completed_milestones(self) -> List[int]:
+        return [milestone for i, milestone in enumerate(self.milestones) if self.completed_bits >> i & 1]
+
+    def is_milestone_completed(self, index: int) -> bool:
+        return bool(self.completed_bits >> index & 1)
 
     def update_progress(self, current_value: int) -> List[int]:
-        # Track newly achieved milestones
-        newly_achieved = []
-        
-        # Check for new milestones
-        for i, milestone in enumerate(self.milestones):
-            if current_value >= milestone and milestone not in self.completed_milestones:
-                self.current_milestone_index = i
-                self.completed_milestones.append(milestone)
-                newly_achieved.append(milestone)
+        # Every milestone at or below the current value is reached; only the ones past
+        # the high-water mark can be new, so the work is O(log M + newly achieved)
+        reached = bisect_right(self.milestones, current_value)
+        if reached <= self.high_water:
+            return []
         
+        newly_achieved = [
+            self.milestones[i] for i in range(self.high_water, reached) if not self.completed_bits >> i & 1
+        ]
+        self.completed_bits |= (1 << reached) - (1 << self.high_water)
+        self.high_water = reached
         return newly_achieved
 
     def get_current_milestone(self):
@@ -109,13 +140,187 @@ class TikTokGoal:
     def is_completed(self):
         return self.current_milestone_index >= len(self.milestones) - 1
 
+    def to_dict(self) -> dict:
+        """Compact form for the goal store: evenly spaced ladders are saved as their step"""
+        data = {"description": self.description, "stat_type": self.stat_type}
+        milestones = self.milestones
+        step = milestones[1] - milestones[0] if len(milestones) > 2 else None
+        if step and all(milestones[i + 1] - milestones[i] == step for i in range(len(milestones) - 1)):
+            data["ladder"] = {"start": milestones[0], "step": step, "maximum": milestones[-1]}
+        else:
+            data["milestones"] = list(milestones)
+        data["completed"] = f"{self.completed_bits:x}"
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        if "ladder" in data:
+            ladder = data["ladder"]
+            goal = cls.ladder(data["description"], data["stat_type"], ladder["step"], ladder["maximum"], ladder["start"])
+        else:
+            goal = cls(data["description"], data["stat_type"], data["milestones"])
+        goal.completed_bits = int(data.get("completed", "0"), 16)
+        goal.high_water = goal.completed_bits.bit_length()
+        return goal
+
+class GoalStore:
+    """Goal ladders and completion state, one small JSON file per account, read on first use"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_path(self, username):
+        return os.path.join(self.directory, f"{username}.json")
+
+    # Returns None for accounts that have never been saved
+    def load(self, username):
+        try:
+            with open(self.get_path(username), 'r') as f:
+                return [TikTokGoal.from_dict(goal) for goal in json.load(f)]
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError) as e:
+            print(f"Could not read saved goals for @{username}: {e}")
+            return None
+
+    # Takes the goals already serialized with to_dict, so it can run off the event loop
+    def save(self, username, goals):
+        # Swap in a complete file, so a crash never leaves a half-written ladder
+        write_atomic(self.get_path(username), json.dumps(goals))
+
+class TrackedAccounts:
+    """Persistent TikTok accounts tracked by each guild, indexed for the poller"""
+
+    def __init__(self, path):
+        self.path = path
+        self.accounts = {}  # guild id -> {username: channel id for achievements}
+        self.guilds_by_account = {}  # username -> set of guild ids
+        
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            for guild_id, guild_accounts in data.items():
+                for username, channel_id in guild_accounts.items():
+                    self.add(int(guild_id), username, channel_id, save=False)
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump({str(guild_id): accounts for guild_id, accounts in self.accounts.items()}, f, indent=4)
+
+    # Track an account in a guild, or move its announcements to another channel
+    def add(self, guild_id, username, channel_id, save=True):
+        self.accounts.setdefault(guild_id, {})[username] = channel_id
+        self.guilds_by_account.setdefault(username, set()).add(guild_id)
+        if save:
+            self.save()
+
+    # Returns whether the guild was tracking the account
+    def remove(self, guild_id, username, save=True):
+        guild_accounts = self.accounts.get(guild_id, {})
+        if username not in guild_accounts:
+            return False
+        del guild_accounts[username]
+        if not guild_accounts:
+            del self.accounts[guild_id]
+        guilds = self.guilds_by_account[username]
+        guilds.discard(guild_id)
+        if not guilds:
+            del self.guilds_by_account[username]
+        if save:
+            self.save()
+        return True
+
+    def get_guild_accounts(self, guild_id):
+        return self.accounts.get(guild_id, {})
+
+    # (guild id, achievement channel id) for every guild tracking the account
+    def get_targets(self, username):
+        return [(guild_id, self.accounts[guild_id][username]) for guild_id in self.guilds_by_account.get(username, ())]
+
+    def get_usernames(self):
+        return self.guilds_by_account.keys()
+
 class TikTokTracker(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.username = "bunny_desiree"
-        self.goals = self._generate_goals()
-        self.last_stats = None
+        self.DEFAULT_USERNAME = "bunny_desiree"  # Always tracked, and shown when no account is given
+        self.ACCOUNTS_FILE = 'tiktok_accounts.json'
+        self.MAX_ACCOUNTS_PER_GUILD = 500
+        self.accounts = TrackedAccounts(self.ACCOUNTS_FILE)
+        self.goals = {}  # username -> list of TikTokGoal, restored on first use
+        self.GOALS_DIR = 'tiktok_goals'
+        self.goal_store = GoalStore(self.GOALS_DIR)
+        self.unseeded_goals = set()  # Accounts whose goals have never seen a scrape
+        self.goal_save_locks = {}  # username -> asyncio.Lock, so saves of one account land in order
+        self.STAT_TYPES = ("followers", "likes")
+        self.MAX_MILESTONES = 100000  # Per goal, so a typo can't build a billion-step ladder
         self.achievement_channel = None  # Set this to a specific channel for achievements
+        self.ACHIEVEMENT_CHANNEL_NAMES = ('achievements', 'announcements', 'general')  # Fallbacks, best first
+        self.guild_channels = {}  # guild id -> resolved fallback channel or None, cleared on channel events
+        
+        # Announcement queue: achievements from one update are coalesced into one embed per channel
+        self.pending_achievements = {}  # username -> [(stat type, milestone)]
+        self.announced = OrderedDict()  # Recently queued (username, stat type, milestone), for deduplication
+        self.MAX_ANNOUNCED = 10000
+        self.MAX_ACHIEVEMENT_LINES = 25
+        self.announcement_ready = asyncio.Event()
+        self.announcer = None
+        self.PROFILE_URL = "https://www.tiktok.com/@{username}"
+        self.session = None  # Shared aiohttp session, created in cog_load
+        self.validators = {}  # username -> ETag / Last-Modified of the last full profile response
+        self.stats_cache = {}  # username -> (stats, time.monotonic() when fetched)
+        self.STATS_TTL = 60  # Seconds before an untracked account's cached stats are refreshed
+        self.lookups = OrderedDict()  # Untracked usernames with cached stats, least recently used first
+        self.MAX_LOOKUPS = 1000
+        self.inflight = {}  # username -> running poll task, shared by every concurrent caller
+        self.HISTORY_DIR = 'tiktok_history'
+        self.history = StatsHistory(self.HISTORY_DIR)
+        self.TREND_WINDOW_SECONDS = 7 * 86400  # Samples the milestone ETAs are fitted over
+        self.trends = {}  # (username, stat type) -> RollingTrend
+        
+        # Fetch pipeline: many profiles in flight at once, but never too fast for one host
+        self.MAX_CONCURRENT_FETCHES = 8
+        self.HOST_RATE = 4  # Requests per second to a single host
+        self.fetch_semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_FETCHES)
+        self.host_buckets = {}  # host -> TokenBucket
+        
+        # Adaptive polling: faster while counts move or a milestone is close, slower when flat
+        self.MIN_POLL_SECONDS = 60
+        self.MAX_POLL_SECONDS = 900
+        self.MAX_BACKOFF_SECONDS = 3600  # Ceiling for the exponential backoff after failed scrapes
+        self.POLL_JITTER = 0.1  # +/- fraction added to every delay so polls don't line up
+        self.poll_state = {}  # username -> {"next_at", "interval", "failures"}
+
+    async def cog_load(self):
+        # One long-lived session, so every scrape reuses a warm keep-alive connection
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.MAX_CONCURRENT_FETCHES,
+                limit_per_host=self.MAX_CONCURRENT_FETCHES,
+                ttl_dns_cache=300,
+                keepalive_timeout=120
+            ),
+            timeout=aiohttp.ClientTimeout(total=15, connect=5),
+            headers={
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            }
+        )
+        self.announcer = asyncio.create_task(self.announce_achievements())
+        self.poll_accounts.start()
+
+    async def cog_unload(self):
+        self.poll_accounts.cancel()
+        if self.announcer:
+            self.announcer.cancel()
+        if self.pending_achievements:
+            # Give queued achievements a last chance; their goal state is already saved
+            try:
+                await asyncio.wait_for(self.flush_achievements(), timeout=10)
+            except Exception as e:
+                print(f"Could not send queued achievements: {e}")
+        if self.session:
+            await self.session.close()
 
     def _generate_goals(self) -> List[TikTokGoal]:
         return [
@@ -131,88 +336,421 @@ class TikTokTracker(commands.Cog):
             )
         ]
 
-    async def send_achievement_message(self, goal_type: str, milestone: int):
-        """Send an achievement message to a specific channel"""
-        if not self.achievement_channel:
-            # Try to find a general or announcements channel if not set
-            self.achievement_channel = discord.utils.get(
-                self.bot.get_all_channels(), 
-                name=['achievements', 'announcements', 'general']
+    def get_goals(self, username: str) -> List[TikTokGoal]:
+        if username not in self.goals and not self.is_tracked(username):
+            # Untracked lookups get the default ladders, filled in from the cached stats and not kept
+            goals = self._generate_goals()
+            cached = self.stats_cache.get(username)
+            if cached:
+                for goal in goals:
+                    goal.update_progress(cached[0][goal.stat_type])
+            return goals
+        if username not in self.goals:
+            # Async callers restore goals with load_goals first, this is only a fallback
+            goals = self.goal_store.load(username)
+            if goals is None:
+                goals = self._generate_goals()
+                self.unseeded_goals.add(username)
+            self.goals[username] = goals
+        return self.goals[username]
+
+    async def load_goals(self, username: str):
+        """Restore a tracked account's goals on a worker thread, the first time they are needed"""
+        if username in self.goals or not self.is_tracked(username):
+            return
+        goals = await asyncio.to_thread(self.goal_store.load, username)
+        if username in self.goals:
+            return  # Another caller restored them while this one waited
+        if goals is None:
+            goals = self._generate_goals()
+            self.unseeded_goals.add(username)
+        self.goals[username] = goals
+
+    # Every account the poller should keep fresh
+    def get_tracked_usernames(self):
+        return {self.DEFAULT_USERNAME, *self.accounts.get_usernames()}
+
+    # Only tracked accounts are polled, and get stored history, goals and announcements
+    def is_tracked(self, username: str) -> bool:
+        return username == self.DEFAULT_USERNAME or username in self.accounts.get_usernames()
+
+    # Drop the cached stats of an account that is no longer polled
+    def forget_stats(self, username: str):
+        self.poll_state.pop(username, None)
+        self.stats_cache.pop(username, None)
+        self.validators.pop(username, None)
+
+    # Mark an untracked lookup as recently used, evicting the oldest beyond MAX_LOOKUPS
+    def touch_lookup(self, username: str):
+        self.lookups[username] = None
+        self.lookups.move_to_end(username)
+        while len(self.lookups) > self.MAX_LOOKUPS:
+            evicted, _ = self.lookups.popitem(last=False)
+            if not self.is_tracked(evicted):
+                self.forget_stats(evicted)
+
+    # Account shown by commands that were not given one
+    def default_username(self, ctx):
+        if ctx.guild:
+            guild_accounts = self.accounts.get_guild_accounts(ctx.guild.id)
+            if guild_accounts:
+                return next(iter(guild_accounts))
+        return self.DEFAULT_USERNAME
+
+    @staticmethod
+    def normalize_username(username: str):
+        # TikTok handles are 2-24 letters, digits, underscores and dots
+        username = username.strip().lstrip('@').lower()
+        return username if re.fullmatch(r'[a-z0-9_.]{2,24}', username) else None
+
+    def get_fallback_channel(self, guild):
+        """Best named achievement channel in a guild, cached until its channels change"""
+        if guild.id not in self.guild_channels:
+            channels = {channel.name: channel for channel in guild.text_channels}
+            self.guild_channels[guild.id] = next(
+                (channels[name] for name in self.ACHIEVEMENT_CHANNEL_NAMES if name in channels), None
             )
+        return self.guild_channels[guild.id]
+
+    def get_achievement_channels(self, username: str):
+        """Channels to announce an account's achievements in, one per guild tracking it"""
+        channels = []
+        targets = self.accounts.get_targets(username)
+        for guild_id, channel_id in targets:
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
+                # The channel it was added from is gone, so fall back to a named one
+                guild = self.bot.get_guild(guild_id)
+                channel = guild and self.get_fallback_channel(guild)
+            if channel:
+                channels.append(channel)
         
-        if self.achievement_channel:
-            embed = discord.Embed(
-                title="🎉 Goal Achieved! 🎉",
-                description=f"**@{self.username}** just reached {milestone:,} {goal_type}!",
-                color=discord.Color.gold()
-            )
-            embed.add_field(
-                name="Celebration 🎈", 
-                value=f"Congratulations on hitting this amazing milestone! Keep pushing forward to the next goal.",
-                inline=False
+        if not targets:
+            # Accounts no guild registered, like the default one, go to a single channel
+            if self.achievement_channel:
+                return [self.achievement_channel]
+            for guild in self.bot.guilds:
+                channel = self.get_fallback_channel(guild)
+                if channel:
+                    return [channel]
+        return channels
+
+    def queue_achievements(self, username: str, achievements):
+        """Queue milestones for the announcer, dropping any already queued"""
+        queued = False
+        for stat_type, milestone in achievements:
+            key = (username, stat_type, milestone)
+            if key in self.announced:
+                continue
+            self.announced[key] = None
+            if len(self.announced) > self.MAX_ANNOUNCED:
+                self.announced.popitem(last=False)
+            self.pending_achievements.setdefault(username, []).append((stat_type, milestone))
+            queued = True
+        if queued:
+            self.announcement_ready.set()
+
+    def build_achievement_embed(self, username: str, achievements) -> discord.Embed:
+        if len(achievements) == 1:
+            stat_type, milestone = achievements[0]
+            title = "🎉 Goal Achieved! 🎉"
+            description = f"**@{username}** just reached {milestone:,} {stat_type}!"
+        else:
+            title = f"🎉 {len(achievements)} Goals Achieved! 🎉"
+            lines = [f"• {milestone:,} {stat_type}" for stat_type, milestone in achievements[:self.MAX_ACHIEVEMENT_LINES]]
+            if len(achievements) > self.MAX_ACHIEVEMENT_LINES:
+                lines.append(f"...and {len(achievements) - self.MAX_ACHIEVEMENT_LINES} more")
+            description = f"**@{username}** just reached:\n" + "\n".join(lines)
+        
+        embed = discord.Embed(
+            title=title,
+            description=description,
+            color=discord.Color.gold()
+        )
+        embed.add_field(
+            name="Celebration 🎈", 
+            value=f"Congratulations on hitting this amazing milestone! Keep pushing forward to the next goal.",
+            inline=False
+        )
+        return embed
+
+    async def flush_achievements(self):
+        pending, self.pending_achievements = self.pending_achievements, {}
+        for username, achievements in pending.items():
+            embed = self.build_achievement_embed(username, achievements)
+            channels = self.get_achievement_channels(username)
+            results = await asyncio.gather(
+                *(channel.send(embed=embed) for channel in channels), return_exceptions=True
             )
-            
+            for result in results:
+                if isinstance(result, Exception):
+                    print(f"Could not send achievement message: {result}")
+
+    async def announce_achievements(self):
+        # Background announcer, so a poll never waits on Discord sends
+        while True:
+            await self.announcement_ready.wait()
+            self.announcement_ready.clear()
             try:
-                await self.achievement_channel.send(embed=embed)
+                await self.flush_achievements()
             except Exception as e:
-                print(f"Could not send achievement message: {e}")
+                print(f"Error announcing achievements: {e}")
 
-    async def fetch_tiktok_stats(self):
+    def invalidate_channels(self, guild):
+        self.guild_channels.pop(guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.invalidate_channels(channel.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.invalidate_channels(channel.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        self.invalidate_channels(after.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.invalidate_channels(guild)
+
+    def get_host_bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).hostname
+        if host not in self.host_buckets:
+            self.host_buckets[host] = TokenBucket(self.HOST_RATE, 1.0)
+        return self.host_buckets[host]
+
+    async def fetch_tiktok_stats(self, username: str):
         """
         Fetch TikTok followers and likes using web scraping
         """
-        url = f"https://www.tiktok.com/@{self.username}"
+        url = self.PROFILE_URL.format(username=username)
+        cached = self.stats_cache.get(username)
+        validators = self.validators.get(username, {})
+        
+        # Revalidate instead of re-downloading when the server gave us validators
+        headers = {}
+        if cached and validators.get("etag"):
+            headers['If-None-Match'] = validators["etag"]
+        if cached and validators.get("last_modified"):
+            headers['If-Modified-Since'] = validators["last_modified"]
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }) as response:
-                    if response.status != 200:
-                        return {
-                            "followers": 0,
-                            "likes": 0
-                        }
-                    
-                    html = await response.text()
-                    
-                    # Extract followers
-                    followers_match = re.search(r'(\d+(?:,\d+)*)\s*Followers', html)
-                    followers = int(followers_match.group(1).replace(',', '')) if followers_match else 0
+            # Bound the number of scrapes in flight, and pace them per host
+            async with self.fetch_semaphore:
+                await self.get_host_bucket(url).acquire()
+                async with self.session.get(url, headers=headers) as response:
+                    if response.status == 304:
+                        # Profile unchanged since the last scrape
+                        self.stats_cache[username] = (cached[0], time.monotonic())
+                        return cached[0]
                     
-                    # Extract likes
-                    likes_match = re.search(r'(\d+(?:,\d+)*)\s*Likes', html)
-                    likes = int(likes_match.group(1).replace(',', '')) if likes_match else 0
-                    
-                    # Track achievements
-                    for goal in self.goals:
-                        newly_achieved = goal.update_progress(
-                            followers if goal.stat_type == "followers" else likes
-                        )
-                        
-                        # Send achievement messages
-                        for milestone in newly_achieved:
-                            await self.send_achievement_message(goal.stat_type, milestone)
+                    if response.status != 200:
+                        print(f"TikTok returned HTTP {response.status} for @{username}")
+                        return None
                     
-                    # Cache stats
-                    self.last_stats = {
-                        "followers": followers,
-                        "likes": likes
+                    new_validators = {
+                        "etag": response.headers.get('ETag'),
+                        "last_modified": response.headers.get('Last-Modified')
                     }
                     
-                    return self.last_stats
+                    # Stream only as far as the embedded state JSON, then stop reading
+                    blob, _ = await tiktok_profile.read_state_blob(response.content)
+            
+            stats = tiktok_profile.extract_stats(blob) if blob else None
+            if stats is None:
+                print(f"No stats found on the TikTok profile page for @{username}")
+                return None
+            
+            # Cache stats, and only now trust the validators that describe them
+            self.validators[username] = new_validators
+            self.stats_cache[username] = (stats, time.monotonic())
+            
+            return stats
         except Exception as e:
-            print(f"Error fetching TikTok stats: {e}")
-            return self.last_stats or {"followers": 0, "likes": 0}
+            print(f"Error fetching TikTok stats for @{username}: {e}")
+            return None
+
+    def get_trend(self, username: str, stat_type: str) -> RollingTrend:
+        """Rolling trend for one stat, seeded from the stored history the first time it's used"""
+        key = (username, stat_type)
+        if not self.is_tracked(username):
+            # Untracked lookups have no stored history, and one scrape is no trend
+            return self.trends.get(key) or RollingTrend(self.TREND_WINDOW_SECONDS)
+        if key not in self.trends:
+            trend = RollingTrend(self.TREND_WINDOW_SECONDS)
+            now = int(time.time())
+            column = 1 if stat_type == "followers" else 2
+            for record in self.history.window(username, now - self.TREND_WINDOW_SECONDS, now):
+                trend.add(record[0], record[column])
+            self.trends[key] = trend
+        return self.trends[key]
+
+    def format_eta(self, username: str, stat_type: str, milestone: int) -> str:
+        eta = self.get_trend(username, stat_type).eta(milestone)
+        return f"<t:{int(eta)}:R>" if eta else "not enough growth yet"
+
+    async def save_goals(self, username: str):
+        """Write an account's goals on a worker thread, snapshotted once no other save is running"""
+        async with self.goal_save_locks.setdefault(username, asyncio.Lock()):
+            snapshot = [goal.to_dict() for goal in self.goals[username]]
+            await asyncio.to_thread(self.goal_store.save, username, snapshot)
+
+    async def check_milestones(self, username: str, stats: Dict[str, int]):
+        """Announce every milestone the new stats have passed"""
+        await self.load_goals(username)
+        goals = self.get_goals(username)
+        achievements = [
+            (goal.stat_type, milestone)
+            for goal in goals
+            for milestone in goal.update_progress(stats[goal.stat_type])
+        ]
+        
+        # The first scrape of an account only records the milestones it has already passed
+        seeding = username in self.unseeded_goals
+        if achievements or seeding:
+            self.unseeded_goals.discard(username)
+            await self.save_goals(username)
+        if seeding:
+            return
+        
+        # Announce only once the state is saved, so a restart can't repeat them
+        self.queue_achievements(username, achievements)
+
+    async def replace_goal(self, username: str, goal: TikTokGoal):
+        """Swap in a new ladder for one stat, keeping milestones already passed quiet"""
+        await self.load_goals(username)
+        current = self.stats_cache.get(username)
+        if current:
+            goal.update_progress(current[0][goal.stat_type])
+        else:
+            latest = self.history.get_latest(username)
+            if latest:
+                goal.update_progress(latest[1 if goal.stat_type == "followers" else 2])
+        goals = [existing for existing in self.get_goals(username) if existing.stat_type != goal.stat_type]
+        goals.append(goal)
+        goals.sort(key=lambda existing: self.STAT_TYPES.index(existing.stat_type))
+        self.goals[username] = goals
+        await self.save_goals(username)
+
+    def next_poll_interval(self, username: str, state: dict, previous: Dict[str, int],
+                           stats: Dict[str, int], elapsed: float) -> float:
+        """Pick the next polling interval from how fast the counts are moving"""
+        interval = state["interval"]
+        if previous is None or previous == stats:
+            # Flat: back off gradually
+            return min(self.MAX_POLL_SECONDS, interval * 1.5)
+        
+        # Moving: poll faster, and faster still if the next milestone is due before the next poll
+        interval = max(self.MIN_POLL_SECONDS, interval / 2)
+        for goal in self.get_goals(username):
+            next_milestone = goal.get_next_milestone()
+            growth = stats[goal.stat_type] - previous[goal.stat_type]
+            if next_milestone is None or growth <= 0:
+                continue
+            eta = (next_milestone - stats[goal.stat_type]) / growth * elapsed
+            interval = min(interval, max(self.MIN_POLL_SECONDS, eta / 2))
+        return interval
+
+    async def poll_account(self, username: str):
+        """Scrape one profile, update the cache, announce milestones and schedule the next poll"""
+        if not self.is_tracked(username):
+            # Ad-hoc lookups are only cached, never scheduled, and get no history or goal state
+            stats = await self.fetch_tiktok_stats(username)
+            self.touch_lookup(username)
+            return stats
+        
+        state = self.poll_state.setdefault(
+            username, {"next_at": 0, "interval": self.MIN_POLL_SECONDS, "failures": 0}
+        )
+        previous, previous_at = self.stats_cache.get(username, (None, 0))
+        stats = await self.fetch_tiktok_stats(username)
+        
+        if stats is None:
+            # Exponential backoff on failures, so a blocked scraper doesn't hammer TikTok
+            state["failures"] += 1
+            delay = min(self.MAX_BACKOFF_SECONDS, state["interval"] * 2 ** state["failures"])
+        else:
+            state["failures"] = 0
+            now = time.time()
+            for stat_type in ("followers", "likes"):
+                self.get_trend(username, stat_type).add(now, stats[stat_type])
+            await asyncio.to_thread(self.history.append, username, now, stats["followers"], stats["likes"])
+            await self.check_milestones(username, stats)
+            elapsed = time.monotonic() - previous_at
+            state["interval"] = delay = self.next_poll_interval(username, state, previous, stats, elapsed)
+        
+        jitter = random.uniform(1 - self.POLL_JITTER, 1 + self.POLL_JITTER)
+        state["next_at"] = time.monotonic() + delay * jitter
+        return stats
+
+    def refresh_stats(self, username: str):
+        """Start a poll, or join the one already running for this profile"""
+        task = self.inflight.get(username)
+        if task is None:
+            task = asyncio.create_task(self.poll_account(username))
+            self.inflight[username] = task
+            task.add_done_callback(lambda _: self.inflight.pop(username, None))
+        return task
+
+    @tasks.loop(seconds=15)
+    async def poll_accounts(self):
+        # Start polls for every account that is due, without waiting for them to finish.
+        # The fetch semaphore keeps a full sweep at about N / MAX_CONCURRENT_FETCHES round-trips.
+        now = time.monotonic()
+        for username in self.get_tracked_usernames():
+            state = self.poll_state.get(username)
+            if state is None or state["next_at"] <= now:
+                self.refresh_stats(username)
+
+    @poll_accounts.before_loop
+    async def before_poll_accounts(self):
+        await self.bot.wait_until_ready()
+
+    async def get_stats(self, username: str) -> Dict[str, int]:
+        """
+        Get stats from the cache the poller keeps fresh. Untracked accounts are not polled,
+        so their stats are revalidated in the background once older than STATS_TTL. Only a
+        cold cache waits, and concurrent callers share that single poll.
+        """
+        tracked = self.is_tracked(username)
+        cached = self.stats_cache.get(username)
+        if cached:
+            if not tracked:
+                self.touch_lookup(username)
+                if time.monotonic() - cached[1] >= self.STATS_TTL:
+                    self.refresh_stats(username)
+            return cached[0]
+        
+        # After a restart, answer from the history while the first poll runs
+        latest = self.history.get_latest(username) if tracked else None
+        if latest:
+            self.refresh_stats(username)
+            return {"followers": latest[1], "likes": latest[2]}
+        
+        # Shield the shared poll so one cancelled command doesn't cancel it for everyone
+        stats = await asyncio.shield(self.refresh_stats(username))
+        return stats or {"followers": 0, "likes": 0}
 
-    @commands.command()
-    async def tiktok(self, ctx):
-        # Fetch stats
-        stats = await self.fetch_tiktok_stats()
+    @commands.group(invoke_without_command=True)
+    async def tiktok(self, ctx, username: str = None):
+        if username is None:
+            username = self.default_username(ctx)
+        else:
+            username = self.normalize_username(username)
+            if username is None:
+                await ctx.send("❌ That doesn't look like a TikTok username.")
+                return
+        
+        # Get stats from the cache
+        stats = await self.get_stats(username)
+        await self.load_goals(username)
+        goals = self.get_goals(username)
         
         # Create embed
         embed = discord.Embed(
-            title=f"🌸 TikTok Stats for @{self.username} 🌸",
+            title=f"🌸 TikTok Stats for @{username} 🌸",
             color=discord.Color.from_rgb(255, 105, 180)  # Hot Pink
         )
         
@@ -221,45 +759,200 @@ class TikTokTracker(commands.Cog):
         embed.add_field(name="❤️ Total Likes", value=f"{stats['likes']:,}", inline=True)
         
         # Find and display suggested goal
-        suggested_goal = max(
-            [goal for goal in self.goals if not goal.is_completed()], 
-            key=lambda x: x.get_next_milestone() or 0
-        )
+        open_goals = [goal for goal in goals if not goal.is_completed()]
+        if open_goals:
+            suggested_goal = max(open_goals, key=lambda x: x.get_next_milestone() or 0)
+            
+            # Add suggested goal progress
+            next_milestone = suggested_goal.get_next_milestone()
+            current_value = stats[suggested_goal.stat_type]
+            
+            embed.add_field(
+                name="🎯 Suggested Goal",
+                value=f"{suggested_goal.description}\n"
+                      f"Next target: {next_milestone:,} {suggested_goal.stat_type}\n"
+                      f"{suggested_goal.progress_bar(current_value, use_direct=True, target_milestone=next_milestone, decimal_places=2)}\n"
+                      f"ETA: {self.format_eta(username, suggested_goal.stat_type, next_milestone)}",
+                inline=False
+            )
+        
+        await ctx.send(embed=embed)
+
+    @tiktok.command(name="add")
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def tiktok_add(self, ctx, username: str):
+        username = self.normalize_username(username)
+        if username is None:
+            await ctx.send("❌ That doesn't look like a TikTok username.")
+            return
         
-        # Add suggested goal progress
-        next_milestone = suggested_goal.get_next_milestone()
-        current_value = stats[suggested_goal.stat_type]
+        guild_accounts = self.accounts.get_guild_accounts(ctx.guild.id)
+        if username not in guild_accounts and len(guild_accounts) >= self.MAX_ACCOUNTS_PER_GUILD:
+            await ctx.send(f"❌ This server already tracks {self.MAX_ACCOUNTS_PER_GUILD} accounts.")
+            return
         
-        embed.add_field(
-            name="🎯 Suggested Goal", 
-            value=f"{suggested_goal.description}\n"
-                  f"Next target: {next_milestone:,} {suggested_goal.stat_type}\n"
-                  f"{suggested_goal.progress_bar(current_value, use_direct=True, target_milestone=next_milestone, decimal_places=2)}",
-            inline=False
+        # Achievements for this account are announced in the channel it was added from
+        self.accounts.add(ctx.guild.id, username, ctx.channel.id)
+        self.refresh_stats(username)
+        await ctx.send(f"🟢 Now tracking **@{username}**. Achievements will be announced in {ctx.channel.mention}.")
+
+    @tiktok.command(name="remove")
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def tiktok_remove(self, ctx, username: str):
+        username = self.normalize_username(username) or username
+        if not self.accounts.remove(ctx.guild.id, username):
+            await ctx.send(f"❌ **@{username}** isn't tracked in this server.")
+            return
+        
+        # Stop polling accounts nobody tracks any more
+        if not self.is_tracked(username):
+            self.forget_stats(username)
+        await ctx.send(f"🔴 Stopped tracking **@{username}**.")
+
+    @tiktok.command(name="list")
+    @commands.guild_only()
+    async def tiktok_list(self, ctx):
+        guild_accounts = self.accounts.get_guild_accounts(ctx.guild.id)
+        if not guild_accounts:
+            await ctx.send("❌ No TikTok accounts are tracked in this server. Add one with `!tiktok add <username>`.")
+            return
+        
+        lines = []
+        for username in sorted(guild_accounts):
+            cached = self.stats_cache.get(username)
+            if cached:
+                lines.append(f"**@{username}**: {cached[0]['followers']:,} followers, {cached[0]['likes']:,} likes")
+            else:
+                lines.append(f"**@{username}**: waiting for first update")
+        
+        # Keep within the embed description limit
+        description = ""
+        for i, line in enumerate(lines):
+            if len(description) + len(line) > 3900:
+                description += f"...and {len(lines) - i} more"
+                break
+            description += line + "\n"
+        
+        embed = discord.Embed(
+            title=f"🌸 Tracked TikTok Accounts ({len(lines)}) 🌸",
+            description=description,
+            color=discord.Color.from_rgb(255, 105, 180)  # Hot Pink
         )
+        await ctx.send(embed=embed)
+
+    @staticmethod
+    def parse_window(window: str):
+        """Parse a history window like 24h, 7d, 4w, 6m or 1y into seconds, or "all" into None"""
+        if window.lower() == "all":
+            return None
+        match = re.fullmatch(r'(\d+)([hdwmy])', window.lower())
+        if not match:
+            raise ValueError(window)
+        units = {"h": 3600, "d": 86400, "w": 7 * 86400, "m": 30 * 86400, "y": 365 * 86400}
+        return int(match.group(1)) * units[match.group(2)]
+
+    @staticmethod
+    def sparkline(values: List[int]) -> str:
+        blocks = "▁▂▃▄▅▆▇█"
+        low, high = min(values), max(values)
+        if high == low:
+            return blocks[0] * len(values)
+        return "".join(blocks[(value - low) * (len(blocks) - 1) // (high - low)] for value in values)
+
+    @tiktok.command(name="history")
+    async def tiktok_history(self, ctx, username: str = None, window: str = "7d"):
+        # Allow the window on its own: !tiktok history 30d
+        if username is not None:
+            try:
+                self.parse_window(username)
+                username, window = None, username
+            except ValueError:
+                pass
+        
+        if username is None:
+            username = self.default_username(ctx)
+        else:
+            username = self.normalize_username(username)
+            if username is None:
+                await ctx.send("❌ That doesn't look like a TikTok username.")
+                return
+        
+        try:
+            seconds = self.parse_window(window)
+        except ValueError:
+            await ctx.send("❌ Use a window like `24h`, `7d`, `4w`, `6m`, `1y` or `all`.")
+            return
+        
+        end = int(time.time())
+        start = 0 if seconds is None else end - seconds
+        resolution = "daily" if seconds is None else self.history.pick_resolution(seconds)
+        points = self.history.window(username, start, end, resolution, max_points=24)
+        if resolution != "raw" and len(points) < 2:
+            # Young accounts may not have enough rollup buckets yet
+            points = self.history.window(username, start, end, "raw", max_points=24)
+        
+        if len(points) < 2:
+            await ctx.send(f"❌ Not enough history for **@{username}** in that window yet.")
+            return
         
+        first, last = points[0], points[-1]
+        days = max((last[0] - first[0]) / 86400, 1 / 24)
+        
+        embed = discord.Embed(
+            title=f"📈 TikTok Growth for @{username} ({window})",
+            description=f"<t:{first[0]}:f> → <t:{last[0]}:f>",
+            color=discord.Color.from_rgb(255, 105, 180)  # Hot Pink
+        )
+        for name, label, column in (("📊 Followers", "followers", 1), ("❤️ Likes", "likes", 2)):
+            growth = last[column] - first[column]
+            embed.add_field(
+                name=name,
+                value=f"{last[column]:,} ({growth:+,})\n"
+                      f"{growth / days:+,.1f} {label}/day\n"
+                      f"`{self.sparkline([point[column] for point in points])}`",
+                inline=False
+            )
         await ctx.send(embed=embed)
 
-    @commands.command()
-    async def goals(self, ctx):
-        # Ensure we have the latest stats
-        await self.fetch_tiktok_stats()
+    @commands.group(invoke_without_command=True)
+    async def goals(self, ctx, username: str = None):
+        if username is None:
+            username = self.default_username(ctx)
+        else:
+            username = self.normalize_username(username)
+            if username is None:
+                await ctx.send("❌ That doesn't look like a TikTok username.")
+                return
+        
+        # Ensure we have recent stats; after a restart they may come from the history only
+        stats = await self.get_stats(username)
+        await self.load_goals(username)
         
         # Create view with buttons
         class GoalsView(discord.ui.View):
-            def __init__(self, cog, ctx):
+            def __init__(self, cog, ctx, username, stats):
                 super().__init__()
                 self.cog = cog
                 self.ctx = ctx
+                self.username = username
+                self.stats = stats
+                self.goals = cog.get_goals(username)
                 self.current_page = 0
-
+                self.COMPLETED_SHOWN = 5
+                self.UPCOMING_SHOWN = 10
+            
             def create_embed(self):
-                stats = self.cog.last_stats or {"followers": 0, "likes": 0}
-                goal = self.cog.goals[self.current_page]
+                # Prefer stats a poll has cached since the view was created
+                cached = self.cog.stats_cache.get(self.username)
+                stats = cached[0] if cached else self.stats
+                goal = self.goals[self.current_page]
                 current_value = stats[goal.stat_type]
-
+                
                 embed = discord.Embed(
-                    title=f"🌈 {goal.description} 🌈", 
+                    title=f"🌈 {goal.description} 🌈",
+                    description=f"@{self.username}",
                     color=discord.Color.from_rgb(186, 85, 211)  # Medium Orchid
                 )
                 
@@ -270,17 +963,27 @@ class TikTokTracker(commands.Cog):
                     inline=False
                 )
                 
-                # All milestones with status
+                # Milestones with status, windowed around the high-water mark for long ladders
+                first = max(0, goal.high_water - self.COMPLETED_SHOWN)
+                last = min(len(goal.milestones), max(goal.high_water, first) + self.UPCOMING_SHOWN)
                 milestone_status = []
-                for milestone in goal.milestones:
-                    if milestone in goal.completed_milestones:
+                if first:
+                    milestone_status.append(f"✅ ... {first:,} earlier milestones")
+                for i in range(first, last):
+                    milestone = goal.milestones[i]
+                    if goal.is_milestone_completed(i):
                         status = "✅ Completed"
                     elif milestone > current_value:
                         status = "🔜 Upcoming"
+                        eta = self.cog.get_trend(self.username, goal.stat_type).eta(milestone)
+                        if eta:
+                            status += f" (<t:{int(eta)}:R>)"
                     else:
                         status = "🟡 In Progress"
                     
                     milestone_status.append(f"{milestone:,}: {status}")
+                if last < len(goal.milestones):
+                    milestone_status.append(f"🔜 ... {len(goal.milestones) - last:,} more up to {goal.milestones[-1]:,}")
                 
                 # Milestone tracking
                 embed.add_field(
@@ -302,7 +1005,8 @@ class TikTokTracker(commands.Cog):
                     remaining = max(0, next_milestone - current_value)
                     embed.add_field(
                         name="Next Milestone",
-                        value=f"{next_milestone:,} {goal.stat_type} (Remaining: {remaining:,})",
+                        value=f"{next_milestone:,} {goal.stat_type} (Remaining: {remaining:,})\n"
+                              f"ETA: {self.cog.format_eta(self.username, goal.stat_type, next_milestone)}",
                         inline=False
                     )
                 else:
@@ -316,7 +1020,7 @@ class TikTokTracker(commands.Cog):
 
             @discord.ui.button(label="◀️ Previous", style=discord.ButtonStyle.secondary)
             async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-                self.current_page = (self.current_page - 1) % len(self.cog.goals)
+                self.current_page = (self.current_page - 1) % len(self.goals)
                 await interaction.response.edit_message(embed=self.create_embed(), view=self)
 
             @discord.ui.button(label="Page", style=discord.ButtonStyle.primary, disabled=True)
@@ -326,19 +1030,88 @@ class TikTokTracker(commands.Cog):
 
             @discord.ui.button(label="Next ▶️", style=discord.ButtonStyle.secondary)
             async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-                self.current_page = (self.current_page + 1) % len(self.cog.goals)
+                self.current_page = (self.current_page + 1) % len(self.goals)
                 await interaction.response.edit_message(embed=self.create_embed(), view=self)
 
             def update_buttons(self):
                 # Update page button
-                self.children[1].label = f"Page {self.current_page + 1}/{len(self.cog.goals)}"
+                self.children[1].label = f"Page {self.current_page + 1}/{len(self.goals)}"
 
         # Create and send the view
-        view = GoalsView(self, ctx)
+        view = GoalsView(self, ctx, username, stats)
         view.update_buttons()
         
         initial_embed = view.create_embed()
         await ctx.send(embed=initial_embed, view=view)
 
+    async def resolve_goal_target(self, ctx, username: str, stat_type: str):
+        """Validate the account and stat of a ladder command, replying with the problem if any"""
+        normalized = self.normalize_username(username)
+        if normalized is None:
+            await ctx.send("❌ That doesn't look like a TikTok username.")
+            return None
+        if normalized != self.DEFAULT_USERNAME and normalized not in self.accounts.get_guild_accounts(ctx.guild.id):
+            await ctx.send(f"❌ **@{normalized}** isn't tracked in this server. Add it with `!tiktok add {normalized}`.")
+            return None
+        if stat_type.lower() not in self.STAT_TYPES:
+            await ctx.send(f"❌ Stat must be one of: {', '.join(self.STAT_TYPES)}.")
+            return None
+        return normalized
+
+    @goals.command(name="set")
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def goals_set(self, ctx, username: str, stat_type: str, *milestones: str):
+        username = await self.resolve_goal_target(ctx, username, stat_type)
+        if username is None:
+            return
+        
+        values = [tiktok_profile.parse_count(milestone.rstrip(',')) for milestone in milestones]
+        if not values or any(value is None or value <= 0 for value in values):
+            await ctx.send("❌ List the milestones as positive numbers, e.g. `100 500 1k 10k 1.5M`.")
+            return
+        if len(values) > self.MAX_MILESTONES:
+            await ctx.send(f"❌ A goal can have at most {self.MAX_MILESTONES:,} milestones.")
+            return
+        
+        stat_type = stat_type.lower()
+        goal = TikTokGoal(f"{stat_type.capitalize()} Milestones", stat_type, values)
+        await self.replace_goal(username, goal)
+        await ctx.send(f"🟢 **@{username}** now has {len(goal.milestones):,} {stat_type} milestones, up to {goal.milestones[-1]:,}.")
+
+    @goals.command(name="ladder")
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def goals_ladder(self, ctx, username: str, stat_type: str, step: str, maximum: str):
+        username = await self.resolve_goal_target(ctx, username, stat_type)
+        if username is None:
+            return
+        
+        step, maximum = tiktok_profile.parse_count(step), tiktok_profile.parse_count(maximum)
+        if not step or not maximum or step <= 0 or maximum < step:
+            await ctx.send("❌ Use a positive step and a larger maximum, e.g. `!goals ladder bunny_desiree followers 1k 10M`.")
+            return
+        if maximum // step > self.MAX_MILESTONES:
+            await ctx.send(f"❌ A goal can have at most {self.MAX_MILESTONES:,} milestones.")
+            return
+        
+        stat_type = stat_type.lower()
+        goal = TikTokGoal.ladder(f"{stat_type.capitalize()} Milestones", stat_type, step, maximum)
+        await self.replace_goal(username, goal)
+        await ctx.send(f"🟢 **@{username}** now has a {stat_type} milestone every {step:,} up to {maximum:,}.")
+
+    @goals.command(name="reset")
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def goals_reset(self, ctx, username: str, stat_type: str):
+        username = await self.resolve_goal_target(ctx, username, stat_type)
+        if username is None:
+            return
+        
+        stat_type = stat_type.lower()
+        goal = next(goal for goal in self._generate_goals() if goal.stat_type == stat_type)
+        await self.replace_goal(username, goal)
+        await ctx.send(f"🔴 **@{username}** is back to the default {stat_type} milestones.")
+
 async def setup(bot):
     await bot.add_cog(TikTokTracker(bot))
\ No newline at end of file
@@ -1,10 +1,268 @@
 import discord
 from discord.ext import commands, tasks
-import requests
+import aiohttp
+import asyncio
 import datetime
+from array import array
+import calendar
+import heapq
+import json
 import os
-import pytz
 import time
+from utils import prayer_calc, timezones
+from utils.files import write_atomic
+from utils.ratelimit import TokenBucket
+
+class CityRegistry:
+    """Persistent cities and prayer subscriptions, indexed for the notification scheduler"""
+    
+    def __init__(self, path, default_cities, default_subscriptions):
+        self.path = path
+        self.cities = {}  # city key -> city information
+        self.subscriptions = {}  # city key -> {user id: set of prayers}
+        
+        # Indexes kept in sync with the data above
+        self.cities_by_timezone = {}  # timezone -> set of city keys
+        self.subscribers = {}  # (city key, prayer) -> set of user ids
+        self.cities_by_user = {}  # user id -> set of city keys
+        
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        else:
+            data = {"cities": default_cities, "subscriptions": default_subscriptions}
+        
+        for city_key, city_info in data["cities"].items():
+            self.add_city(city_key, city_info, save=False)
+        for city_key, city_subscriptions in data["subscriptions"].items():
+            for user_id, prayers in city_subscriptions.items():
+                self.subscribe(city_key, int(user_id), prayers, save=False)
+        self.save()
+    
+    def save(self):
+        data = {
+            "cities": self.cities,
+            "subscriptions": {
+                city_key: {str(user_id): sorted(prayers) for user_id, prayers in city_subscriptions.items()}
+                for city_key, city_subscriptions in self.subscriptions.items()
+            }
+        }
+        with open(self.path, 'w') as f:
+            json.dump(data, f, indent=4)
+    
+    # Add a city, or update it in place keeping its subscribers
+    def add_city(self, city_key, city_info, save=True):
+        if city_key in self.cities:
+            self.cities_by_timezone[self.cities[city_key]["timezone"]].discard(city_key)
+        self.cities[city_key] = city_info
+        self.subscriptions.setdefault(city_key, {})
+        self.cities_by_timezone.setdefault(city_info["timezone"], set()).add(city_key)
+        if save:
+            self.save()
+    
+    def remove_city(self, city_key, save=True):
+        for user_id in list(self.subscriptions.get(city_key, {})):
+            self.unsubscribe(city_key, user_id, save=False)
+        city_info = self.cities.pop(city_key)
+        del self.subscriptions[city_key]
+        timezone_cities = self.cities_by_timezone[city_info["timezone"]]
+        timezone_cities.discard(city_key)
+        if not timezone_cities:
+            del self.cities_by_timezone[city_info["timezone"]]
+        if save:
+            self.save()
+    
+    # Returns the prayers that were not already subscribed
+    def subscribe(self, city_key, user_id, prayers, save=True):
+        user_prayers = self.subscriptions[city_key].setdefault(user_id, set())
+        added = set(prayers) - user_prayers
+        user_prayers.update(added)
+        for prayer in added:
+            self.subscribers.setdefault((city_key, prayer), set()).add(user_id)
+        self.cities_by_user.setdefault(user_id, set()).add(city_key)
+        if save:
+            self.save()
+        return added
+    
+    # Unsubscribe from the given prayers, or from the whole city when prayers is None
+    def unsubscribe(self, city_key, user_id, prayers=None, save=True):
+        user_prayers = self.subscriptions.get(city_key, {}).get(user_id, set())
+        removed = set(user_prayers) if prayers is None else user_prayers & set(prayers)
+        user_prayers -= removed
+        for prayer in removed:
+            prayer_subscribers = self.subscribers[(city_key, prayer)]
+            prayer_subscribers.discard(user_id)
+            if not prayer_subscribers:
+                del self.subscribers[(city_key, prayer)]
+        if not user_prayers:
+            self.subscriptions.get(city_key, {}).pop(user_id, None)
+            self.cities_by_user.get(user_id, set()).discard(city_key)
+        if save:
+            self.save()
+        return removed
+    
+    def get_subscribers(self, city_key, prayer):
+        return self.subscribers.get((city_key, prayer), set())
+    
+    def get_user_cities(self, user_id):
+        return self.cities_by_user.get(user_id, set())
+    
+    # Cities that have at least one subscriber
+    def get_active_cities(self):
+        return [city_key for city_key, city_subscriptions in self.subscriptions.items() if city_subscriptions]
+
+class NotificationJournal:
+    """Append-only log of sent notifications, replayed on load so restarts don't re-send"""
+    
+    def __init__(self, path, oldest_date):
+        self.path = path
+        self.oldest_date = oldest_date  # Entries before this are no longer kept
+        self.sent = set()  # (city key, prayer, local date) already delivered
+        self.pending = []  # Lines recorded since the last flush
+        self.write_lock = asyncio.Lock()  # Keeps appends out of the file while it is compacted
+        
+        sent, kept_lines, dropped = self.read(oldest_date)
+        self.sent.update(sent)
+        if dropped:
+            self.rewrite(kept_lines)
+    
+    # Replay the journal, dropping entries too old to matter
+    def read(self, oldest_date):
+        sent = set()
+        kept_lines = []
+        dropped = False
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        date = datetime.date.fromisoformat(entry["date"])
+                    except (ValueError, KeyError):
+                        dropped = True  # Torn final line from a crash mid-write
+                        continue
+                    if date < oldest_date:
+                        dropped = True
+                        continue
+                    sent.add((entry["city"], entry["prayer"], date))
+                    kept_lines.append(line if line.endswith("\n") else line + "\n")
+        return sent, kept_lines, dropped
+    
+    # Compact, so the journal only ever holds the last couple of days
+    def rewrite(self, lines):
+        write_atomic(self.path, "".join(lines))
+    
+    def compact(self, oldest_date):
+        _, kept_lines, dropped = self.read(oldest_date)
+        if dropped:
+            self.rewrite(kept_lines)
+    
+    def is_sent(self, city_key, prayer, date):
+        return (city_key, prayer, date) in self.sent
+    
+    def record(self, city_key, prayer, date):
+        self.sent.add((city_key, prayer, date))
+        self.pending.append(json.dumps({
+            "date": date.isoformat(),
+            "city": city_key,
+            "prayer": prayer,
+            "sent_at": int(time.time())
+        }) + "\n")
+    
+    def write(self, lines):
+        with open(self.path, 'a') as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+    
+    # Write every pending record with a single fsync, off the event loop
+    async def flush(self):
+        async with self.write_lock:
+            if not self.pending:
+                return
+            lines, self.pending = self.pending, []
+            await asyncio.to_thread(self.write, lines)
+    
+    # Forget entries older than a date, in memory and on disk, once per day
+    async def forget_before(self, oldest_date):
+        if oldest_date <= self.oldest_date:
+            return
+        self.oldest_date = oldest_date
+        self.sent = {entry for entry in self.sent if entry[2] >= oldest_date}
+        async with self.write_lock:
+            await asyncio.to_thread(self.compact, oldest_date)
+
+class NotificationDispatcher:
+    """Per-channel send queues drained concurrently, each under Discord's channel rate limit"""
+    
+    def __init__(self, bot, rate=5, per=5.0, global_rate=50, global_per=1.0):
+        self.bot = bot
+        self.rate = rate
+        self.per = per
+        self.global_bucket = TokenBucket(global_rate, global_per)
+        self.buckets = {}  # channel id -> TokenBucket, kept so limits carry over between bursts
+        self.queues = {}  # channel id -> asyncio.Queue of (content, embed, future)
+        self.workers = {}  # channel id -> worker task, only while the queue has messages
+    
+    # Queue a message, the returned future resolves to True once it has been sent
+    def submit(self, channel_id, content, embed=None):
+        future = asyncio.get_running_loop().create_future()
+        if channel_id not in self.queues:
+            self.queues[channel_id] = asyncio.Queue()
+            self.buckets.setdefault(channel_id, TokenBucket(self.rate, self.per))
+        self.queues[channel_id].put_nowait((content, embed, future))
+        
+        if channel_id not in self.workers:
+            self.workers[channel_id] = asyncio.create_task(self.drain(channel_id))
+        return future
+    
+    async def drain(self, channel_id):
+        queue = self.queues[channel_id]
+        bucket = self.buckets[channel_id]
+        future = None
+        try:
+            while not queue.empty():
+                content, embed, future = queue.get_nowait()
+                # Any failure only costs this message, the rest of the queue still goes out
+                try:
+                    channel = self.bot.get_channel(channel_id)
+                    if not channel:
+                        print(f"Channel with ID {channel_id} not found.")
+                        future.set_result(False)
+                        continue
+                    
+                    await bucket.acquire()
+                    await self.global_bucket.acquire()
+                    await channel.send(content, embed=embed)
+                    future.set_result(True)
+                except Exception as e:
+                    print(f"Could not send prayer notification to {channel_id}: {e}")
+                    future.set_result(False)
+        finally:
+            self.fail_unsent(queue, future)
+            del self.workers[channel_id]
+            del self.queues[channel_id]
+    
+    # Resolve every future that will never be sent, so nothing awaits it forever
+    @staticmethod
+    def fail_unsent(queue, in_flight=None):
+        futures = [in_flight] if in_flight else []
+        while not queue.empty():
+            futures.append(queue.get_nowait()[2])
+        for future in futures:
+            if not future.done():
+                future.set_result(False)
+    
+    async def close(self):
+        workers = list(self.workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        
+        # A worker cancelled before it started never reaches its finally
+        for queue in self.queues.values():
+            self.fail_unsent(queue)
+        self.queues.clear()
+        self.workers.clear()
 
 class PrayerTimesCog(commands.Cog):
     def __init__(self, bot):
@@ -12,11 +270,47 @@ class PrayerTimesCog(commands.Cog):
         
         # Bot configuration
         self.CHANNEL_ID = int(os.environ.get('CHANNEL_ID'))  # Channel ID where messages will be sent
-        self.REGGIO_USER_ID = 816786360693555251  # User ID to ping for Reggio Emilia
-        self.WARSAW_USER_ID = 1231967004894953513  # User ID to ping for Warsaw
+        self.CITIES_FILE = 'prayer_cities.json'  # Persistent cities and subscriptions
+        self.JOURNAL_FILE = 'prayer_notifications.log'  # Sent notifications, one JSON object per line
+        self.REGGIO_USER_ID = 816786360693555251  # Default subscriber for Reggio Emilia
+        self.WARSAW_USER_ID = 1231967004894953513  # Default subscriber for Warsaw
         
         # Prayer API configuration
-        self.PRAYER_API_URL = "http://api.aladhan.com/v1/timingsByCity"
+        self.PRAYER_CALENDAR_URL = "http://api.aladhan.com/v1/calendarByCity"
+        self.PRAYER_API_TIMEOUT = aiohttp.ClientTimeout(total=15, connect=5)  # Per-request timeout
+        self.PRAYER_METHOD = 3  # Aladhan method 3, Muslim World League
+        self.PRAYER_BACKEND = os.environ.get('PRAYER_BACKEND', 'api')  # "api" or "local" (offline calculation)
+        self.PRAYERS = ("Fajr", "Dhuhr", "Asr", "Maghrib", "Isha")  # Column order of the month tables
+        self.NO_TIME = 0xFFFF  # Month table entry for a prayer the sun never reaches that day
+        self.session = None  # Shared aiohttp session, created in cog_load
+        
+        # Monthly timetables: (city key, method, year, month) -> array of minutes after
+        # local midnight, one row of len(self.PRAYERS) entries per day of the month
+        # Tables handed over by the previous instance survive a !reload without new API calls
+        self.month_tables = getattr(bot, 'prayer_month_tables', {})
+        self.pending_tables = {}  # In-flight calendar requests, so each month is fetched once
+        self.fallback_tables = set()  # Months computed locally because the API failed, retried hourly
+        self.PREFETCH_DAYS = 3  # Load next month's calendar this many days before the month ends
+        
+        # Notification schedule: min-heap of (UTC fire time, key, event, local date)
+        # A ROLLOVER entry is keyed by timezone and schedules the next day of every city in it,
+        # a RETRY entry is keyed by city and re-arms a city whose timetable could not be loaded
+        self.ROLLOVER = ""
+        self.RETRY = "*"
+        self.RETRY_SECONDS = 300
+        self.prayer_schedule = []
+        self.scheduled_events = set()  # (city key, prayer, local date) already in the heap
+        self.armed_timezones = set()  # Timezones with a pending rollover
+        self.schedule_changed = asyncio.Event()
+        self.CATCH_UP_SECONDS = 600  # Still send prayers this late if a restart made us miss them
+        self.journal = NotificationJournal(self.JOURNAL_FILE, self.get_journal_horizon())
+        self.journal_tasks = set()  # Keeps pending journal writes referenced until they finish
+        
+        # Alerts due together are grouped per channel into messages of at most this many alerts,
+        # pinging at most MAX_MENTIONS users per message to stay under the 2000 character limit
+        self.MAX_ALERTS_PER_MESSAGE = 25
+        self.MAX_MENTIONS = 80
+        self.dispatcher = NotificationDispatcher(bot)
         
         # Animated emoji IDs
         self.animated_emojis = {
@@ -28,27 +322,31 @@ class PrayerTimesCog(commands.Cog):
             "prayer": "EMOJI_ID_HERE"     # Placeholder - replace with actual ID
         }
         
-        # City information
-        self.cities = {
+        # Default city information, used to create the registry file on first run
+        default_cities = {
             "reggio": {
                 "name": "Reggio Emilia",
                 "country": "Italy",
                 "timezone": "Europe/Rome",
-                "user_id": self.REGGIO_USER_ID,
-                "last_notified_date": None,
-                "prayers_notified": {"Fajr": False, "Maghrib": False},
+                "latitude": 44.6989,
+                "longitude": 10.6297,
                 "emoji": "🇮🇹"
             },
             "warsaw": {
                 "name": "Warsaw",
                 "country": "Poland",
                 "timezone": "Europe/Warsaw",
-                "user_id": self.WARSAW_USER_ID,
-                "last_notified_date": None,
-                "prayers_notified": {"Fajr": False, "Maghrib": False},
+                "latitude": 52.2297,
+                "longitude": 21.0122,
                 "emoji": "🇵🇱"
             }
         }
+        default_subscriptions = {
+            "reggio": {str(self.REGGIO_USER_ID): ["Fajr", "Maghrib"]},
+            "warsaw": {str(self.WARSAW_USER_ID): ["Fajr", "Maghrib"]}
+        }
+        self.registry = CityRegistry(self.CITIES_FILE, default_cities, default_subscriptions)
+        self.cities = self.registry.cities
         
         # Prayer emojis and colors
         self.prayer_info = {
@@ -57,19 +355,51 @@ class PrayerTimesCog(commands.Cog):
                 "animated_emoji_key": "fajr",  # Key for the animated emoji in the dictionary
                 "color": 0x48C9B0  # Teal
             },
+            "Dhuhr": {
+                "emoji": "☀️",
+                "animated_emoji_key": "dhuhr",
+                "color": 0xF1C40F  # Yellow
+            },
+            "Asr": {
+                "emoji": "🌤️",
+                "animated_emoji_key": "asr",
+                "color": 0xE67E22  # Orange
+            },
             "Maghrib": {
                 "emoji": "🕌",  # Fallback regular emoji
                 "animated_emoji_key": "maghrib",  # Key for the animated emoji in the dictionary
                 "color": 0x9B59B6  # Purple
+            },
+            "Isha": {
+                "emoji": "🌙",
+                "animated_emoji_key": "isha",
+                "color": 0x34495E  # Dark blue
             }
         }
         
-        # Start the task when the cog is initialized
+        # Message skeletons with emojis resolved, rebuilt when the emoji configuration changes
+        self.compile_templates()
+        
+    async def cog_load(self):
+        # One pooled session for every API call made by this cog
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300),
+            timeout=self.PRAYER_API_TIMEOUT
+        )
+        
+        # Start the tasks once the session is ready
+        self.refresh_timetables.start()
         self.check_prayer_times.start()
     
-    def cog_unload(self):
-        # Stop the task when the cog is unloaded
+    async def cog_unload(self):
+        # Stop the task and release the HTTP connections when the cog is unloaded
         self.check_prayer_times.cancel()
+        self.refresh_timetables.cancel()
+        await self.dispatcher.close()
+        await self.journal.flush()
+        self.bot.prayer_month_tables = self.month_tables
+        if self.session:
+            await self.session.close()
     
     # Helper function to get animated emoji or fallback to regular emoji
     def get_emoji(self, key, fallback=""):
@@ -77,169 +407,503 @@ class PrayerTimesCog(commands.Cog):
             return f"<a:{key}:{self.animated_emojis[key]}>"
         return fallback
     
-    # Function to get prayer times for a specific city
-    def get_prayer_times(self, city_name, country):
+    # Compile every message skeleton once, so sending a message only fills in timestamps
+    # Templates use %-formatting, which is much cheaper than str.format on these strings
+    def compile_templates(self):
+        clock_emoji = self.get_emoji("clock", "⏰")
+        location_emoji = self.get_emoji("location", "📍")
+        prayer_time_emoji = self.get_emoji("prayer", "⏳")
+        test_emoji = self.get_emoji("99", "")  # Using your provided emoji
+        title_emoji = self.get_emoji("99", "🕌")
+        
+        self.prayer_templates = {}
+        for prayer, info in self.prayer_info.items():
+            prayer_emoji = self.get_emoji(info["animated_emoji_key"], info["emoji"])
+            self.prayer_templates[prayer] = {
+                "description": f"**{prayer_emoji} {prayer} Time {prayer_emoji}**",
+                # Arguments: current timestamp, location, prayer timestamp
+                "body": f"{clock_emoji} **Current Time:** <t:%d:t>\n"
+                        f"{location_emoji} **Location:** %s\n"
+                        f"{prayer_time_emoji} **Prayer Time:** <t:%d:t>\n"
+                        f"{test_emoji} Using your provided emoji",
+                "field_name": f"{prayer_emoji} {prayer}",
+                "emoji": prayer_emoji
+            }
+        
+        # Argument: current timestamp
+        self.combined_template = f"**{title_emoji} Prayer Time {title_emoji}**\n{clock_emoji} **Current Time:** <t:%d:t>"
+        self.gettime_title = f"{title_emoji} Today's Prayer Times {title_emoji}"
+        # Arguments: date, Fajr timestamp, Maghrib timestamp
+        self.gettime_template = (
+            "**Date:** %s\n\n"
+            f"{self.prayer_templates['Fajr']['emoji']} **Fajr:** <t:%d:t>\n\n"
+            f"{self.prayer_templates['Maghrib']['emoji']} **Maghrib:** <t:%d:t>\n\n"
+            f"{test_emoji}\n\u200B"
+        )
+        self.city_templates = {}  # Filled lazily by get_city_template
+    
+    # Get a city's precompiled location strings
+    def get_city_template(self, city_key):
+        template = self.city_templates.get(city_key)
+        if not template:
+            city_info = self.cities[city_key]
+            location = f"{city_info['emoji']} {city_info['name']}, {city_info['country']}"
+            template = {
+                "location": location,
+                "heading": f"\n{city_info['emoji']} **{city_info['name']}, {city_info['country']}**"
+            }
+            self.city_templates[city_key] = template
+        return template
+    
+    # Function to get a whole month of prayer times for a specific city
+    async def get_prayer_calendar(self, city_name, country, year, month):
+        url = f"{self.PRAYER_CALENDAR_URL}/{year}/{month}"
         params = {
             'city': city_name,
             'country': country,
-            'method': 3  # ISNA calculation method
+            'method': self.PRAYER_METHOD
         }
         
         try:
-            response = requests.get(self.PRAYER_API_URL, params=params)
-            data = response.json()
+            async with self.session.get(url, params=params, timeout=self.PRAYER_API_TIMEOUT) as response:
+                data = await response.json(content_type=None)
             
-            if response.status_code == 200 and data['code'] == 200:
-                timings = data['data']['timings']
-                date = data['data']['date']['gregorian']['date']
-                return {
-                    "date": date,
-                    "Fajr": timings['Fajr'],
-                    "Maghrib": timings['Maghrib'],
-                    "timestamp": data['data']['date']['timestamp']
-                }
+            if response.status == 200 and data['code'] == 200:
+                days = sorted(data['data'], key=lambda day: int(day['date']['gregorian']['day']))
+                
+                # Pack the month into a flat array, timings look like "05:12 (CET)"
+                table = array('H')
+                for day in days:
+                    for prayer in self.PRAYERS:
+                        hour, minute = map(int, day['timings'][prayer].split()[0].split(':'))
+                        table.append(hour * 60 + minute)
+                return table
             else:
-                print(f"Error fetching prayer times: {data.get('status')}")
+                print(f"Error fetching prayer calendar: {data.get('status')}")
                 return None
+        except asyncio.TimeoutError:
+            print(f"Timed out fetching prayer calendar for {city_name}, {country}")
+            return None
         except Exception as e:
             print(f"Error in API request: {e}")
             return None
     
+    # Function to compute a whole month of prayer times offline from the city's coordinates
+    def compute_prayer_calendar(self, city_info, year, month):
+        table = array('H')
+        for day in range(1, calendar.monthrange(year, month)[1] + 1):
+            # Use the UTC offset at local noon, so DST changes apply from the day they happen
+            date = datetime.date(year, month, day)
+            timings = prayer_calc.prayer_times(
+                city_info["latitude"],
+                city_info["longitude"],
+                date,
+                timezones.utc_offset(city_info["timezone"], date) / 3600,
+                self.PRAYER_METHOD
+            )
+            for prayer in self.PRAYERS:
+                # None during polar day or night, when the sun never reaches the prayer's angle
+                if timings[prayer] is None:
+                    table.append(self.NO_TIME)
+                    continue
+                hour, minute = map(int, timings[prayer].split(':'))
+                table.append(hour * 60 + minute)
+        return table
+    
+    # Get the current date in a city's timezone
+    def get_local_date(self, city_info, current_time=None):
+        timestamp = current_time.timestamp() if current_time else time.time()
+        return timezones.local_date(city_info["timezone"], timestamp)
+    
+    # Tables are keyed by city key, so editing a city's name or location never orphans them
+    def get_table_key(self, city_key, year, month):
+        return (city_key, self.PRAYER_METHOD, year, month)
+    
+    # Load a city's month table, fetching the calendar only if it isn't in memory yet
+    async def load_month_table(self, city_key, year, month, retry_fallback=False):
+        city_info = self.cities[city_key]
+        table_key = self.get_table_key(city_key, year, month)
+        if table_key in self.month_tables and not (retry_fallback and table_key in self.fallback_tables):
+            return self.month_tables[table_key]
+        
+        if self.PRAYER_BACKEND == 'local':
+            table = self.compute_prayer_calendar(city_info, year, month)
+            self.month_tables[table_key] = table
+            return table
+        
+        pending = self.pending_tables.get(table_key)
+        if not pending:
+            pending = asyncio.create_task(
+                self.get_prayer_calendar(city_info["name"], city_info["country"], year, month)
+            )
+            self.pending_tables[table_key] = pending
+            pending.add_done_callback(lambda task: self.forget_pending_table(table_key, task))
+        
+        table = await pending
+        if self.cities.get(city_key) is not city_info:
+            return None  # The city was edited or removed while its calendar was loading
+        if table:
+            self.month_tables[table_key] = table
+            self.fallback_tables.discard(table_key)
+        elif table_key in self.month_tables:
+            # Keep serving the locally computed month until the API is back
+            table = self.month_tables[table_key]
+        elif "latitude" in city_info:
+            print(f"Using offline prayer times for {city_info['name']} until the API responds")
+            table = self.compute_prayer_calendar(city_info, year, month)
+            self.month_tables[table_key] = table
+            self.fallback_tables.add(table_key)
+        return table
+    
+    def forget_pending_table(self, table_key, task):
+        # A newer request may already have replaced this one after a city edit
+        if self.pending_tables.get(table_key) is task:
+            del self.pending_tables[table_key]
+    
+    # Load the month containing each city's local date at the given time, subscribed cities by default
+    async def warm_timetables(self, at_time, city_keys=None, retry_fallback=False):
+        if city_keys is None:
+            city_keys = self.registry.get_active_cities()
+        
+        months = {}
+        for city_key in city_keys:
+            city_info = self.cities[city_key]
+            local_date = self.get_local_date(city_info, at_time)
+            months[self.get_table_key(city_key, local_date.year, local_date.month)] = (city_key, local_date)
+        
+        await asyncio.gather(*(
+            self.load_month_table(city_key, local_date.year, local_date.month, retry_fallback)
+            for city_key, local_date in months.values()
+        ))
+    
+    # Drop month tables that no city can still be in, whatever its UTC offset
+    def evict_expired_timetables(self, current_time):
+        oldest_date = (current_time - datetime.timedelta(days=1)).date()
+        oldest_month = (oldest_date.year, oldest_date.month)
+        expired = [key for key in self.month_tables if key[2:] < oldest_month]
+        for key in expired:
+            del self.month_tables[key]
+            self.fallback_tables.discard(key)
+    
+    # Read a city's prayer times for a date from memory, returns None if the month isn't loaded
+    # A prayer that has no time on that date is None
+    def lookup_prayer_times(self, city_key, date):
+        table = self.month_tables.get(self.get_table_key(city_key, date.year, date.month))
+        row = (date.day - 1) * len(self.PRAYERS)
+        if table is None or row >= len(table):
+            return None
+        
+        prayer_data = {"date": date.strftime("%d-%m-%Y")}
+        for column, prayer in enumerate(self.PRAYERS):
+            minutes = table[row + column]
+            prayer_data[prayer] = None if minutes == self.NO_TIME else f"{minutes // 60:02d}:{minutes % 60:02d}"
+        return prayer_data
+    
+    # Get today's prayer times for the given cities from the month tables
+    def get_all_prayer_times(self, city_keys, current_time=None):
+        return {
+            city_key: self.lookup_prayer_times(city_key, self.get_local_date(self.cities[city_key], current_time))
+            for city_key in city_keys
+        }
+    
     # Function to convert HH:MM to Unix timestamp for a given date and timezone
     def time_to_timestamp(self, time_str, date_str, timezone_str):
         # Parse the date and time
         hour, minute = map(int, time_str.split(':'))
         day, month, year = map(int, date_str.split('-'))
         
-        # Create a datetime object in the specified timezone
-        tz = pytz.timezone(timezone_str)
-        dt = datetime.datetime(year, month, day, hour, minute, 0, tzinfo=tz)
-        
-        # Convert to Unix timestamp (seconds since epoch)
-        return int(dt.timestamp())
+        # Resolve with the zone's real offset on that date (tzinfo=pytz zone would use LMT)
+        return timezones.local_to_timestamp(timezone_str, datetime.date(year, month, day), hour * 60 + minute)
     
-    # Reset notification flags when the day changes
-    def reset_notification_flags(self, city_key):
-        current_date = datetime.datetime.now().strftime("%d-%m-%Y")
-        if self.cities[city_key]["last_notified_date"] != current_date:
-            self.cities[city_key]["last_notified_date"] = current_date
-            self.cities[city_key]["prayers_notified"] = {"Fajr": False, "Maghrib": False}
+    # Get the Unix timestamp of a local HH:MM on a date in a city's timezone
+    def get_local_timestamp(self, city_info, date, time_str):
+        hour, minute = map(int, time_str.split(':'))
+        return timezones.local_to_timestamp(city_info["timezone"], date, hour * 60 + minute)
     
-    @tasks.loop(minutes=1)
-    async def check_prayer_times(self):
-        channel = self.bot.get_channel(self.CHANNEL_ID)
-        if not channel:
-            print(f"Channel with ID {self.CHANNEL_ID} not found.")
+    # Oldest local date any city can still be on, older journal entries can be forgotten
+    def get_journal_horizon(self):
+        return datetime.datetime.now(datetime.timezone.utc).date() - datetime.timedelta(days=1)
+    
+    # Push one event onto the schedule and wake the scheduler
+    def schedule_event(self, fire_time, key, event, date):
+        heapq.heappush(self.prayer_schedule, (fire_time, key, event, date))
+        self.schedule_changed.set()
+    
+    # Schedule a city's subscribed prayers for one local date
+    async def schedule_city_day(self, city_key, date):
+        city_info = self.cities[city_key]
+        prayers = [prayer for prayer in self.PRAYERS if self.registry.get_subscribers(city_key, prayer)]
+        if not prayers:
             return
         
-        current_time = datetime.datetime.now(pytz.timezone('UTC'))
-        
-        for city_key, city_info in self.cities.items():
-            # Reset notification flags if it's a new day
-            self.reset_notification_flags(city_key)
-            
-            # Get prayer times for the city
-            prayer_data = self.get_prayer_times(city_info["name"], city_info["country"])
+        prayer_data = self.lookup_prayer_times(city_key, date)
+        if not prayer_data:
+            # The month is missing (e.g. the API was down), load it and retry later if needed
+            await self.load_month_table(city_key, date.year, date.month)
+            prayer_data = self.lookup_prayer_times(city_key, date)
             if not prayer_data:
+                self.schedule_event(time.time() + self.RETRY_SECONDS, city_key, self.RETRY, date)
+                return
+        
+        now = time.time()
+        for prayer in prayers:
+            if prayer_data[prayer] is None:
                 continue
+            fire_time = self.get_local_timestamp(city_info, date, prayer_data[prayer])
+            if fire_time < now - self.CATCH_UP_SECONDS or self.journal.is_sent(city_key, prayer, date):
+                continue
+            if (city_key, prayer, date) not in self.scheduled_events:
+                self.scheduled_events.add((city_key, prayer, date))
+                self.schedule_event(fire_time, city_key, prayer, date)
+    
+    # Schedule today's events for a city and make sure its timezone rolls over at midnight
+    async def arm_city(self, city_key):
+        city_info = self.cities[city_key]
+        today = self.get_local_date(city_info)
+        await self.schedule_city_day(city_key, today)
+        
+        if city_info["timezone"] not in self.armed_timezones:
+            self.armed_timezones.add(city_info["timezone"])
+            next_date = today + datetime.timedelta(days=1)
+            next_midnight = self.get_local_timestamp(city_info, next_date, "00:00")
+            self.schedule_event(next_midnight, city_info["timezone"], self.ROLLOVER, next_date)
+    
+    # Drop a city's tables and pending events, which were built from its old settings
+    def forget_city(self, city_key):
+        for table_key in [key for key in self.month_tables if key[0] == city_key]:
+            del self.month_tables[table_key]
+            self.fallback_tables.discard(table_key)
+        for table_key in [key for key in self.pending_tables if key[0] == city_key]:
+            del self.pending_tables[table_key]
+        
+        # Events were timed with the old timezone and location
+        self.prayer_schedule = [entry for entry in self.prayer_schedule if entry[1] != city_key]
+        heapq.heapify(self.prayer_schedule)
+        self.scheduled_events = {event for event in self.scheduled_events if event[0] != city_key}
+        self.schedule_changed.set()
+    
+    # Forget a city after an edit, then load and schedule it again
+    async def reload_city(self, city_key):
+        self.forget_city(city_key)
+        if self.registry.subscriptions[city_key]:
+            await self.warm_timetables(datetime.datetime.now(datetime.timezone.utc), [city_key])
+            await self.arm_city(city_key)
+    
+    # Schedule the next day for every subscribed city in a timezone, then re-arm its rollover
+    async def rollover_timezone(self, timezone, date):
+        try:
+            await self.journal.forget_before(self.get_journal_horizon())
+        except OSError as e:
+            print(f"❌ Failed to compact prayer journal: {e}")
+
+        city_keys = [
+            city_key for city_key in self.registry.cities_by_timezone.get(timezone, ())
+            if self.registry.subscriptions[city_key]
+        ]
+        if not city_keys:
+            self.armed_timezones.discard(timezone)
+            return
+        
+        for city_key in city_keys:
+            await self.schedule_city_day(city_key, date)
+        
+        next_date = date + datetime.timedelta(days=1)
+        next_midnight = self.get_local_timestamp(self.cities[city_keys[0]], next_date, "00:00")
+        self.schedule_event(next_midnight, timezone, self.ROLLOVER, next_date)
+    
+    # Build the notification embed for one prayer in one city
+    def build_prayer_embed(self, city_key, prayer, date):
+        city_info = self.cities[city_key]
+        prayer_data = self.lookup_prayer_times(city_key, date)
+        template = self.prayer_templates[prayer]
+        
+        # Get Unix timestamps for Discord timestamp formatting
+        prayer_timestamp = self.time_to_timestamp(prayer_data[prayer], prayer_data["date"], city_info["timezone"])
+        
+        embed = discord.Embed(description=template["description"], color=self.prayer_info[prayer]['color'])
+        embed.add_field(
+            name="",
+            value=template["body"] % (time.time(), self.get_city_template(city_key)["location"], prayer_timestamp),
+            inline=False
+        )
+        embed.set_footer(text=f"Date: {prayer_data['date']}")
+        return embed
+    
+    # Build one embed listing several prayers that are due at the same time
+    def build_combined_embed(self, alerts):
+        embed = discord.Embed(
+            description=self.combined_template % time.time(),
+            color=self.prayer_info[alerts[0][1]]['color']
+        )
+        
+        for city_key, prayer, date in alerts:
+            city_info = self.cities[city_key]
+            prayer_data = self.lookup_prayer_times(city_key, date)
+            prayer_timestamp = self.time_to_timestamp(prayer_data[prayer], prayer_data["date"], city_info["timezone"])
+            embed.add_field(
+                name=self.prayer_templates[prayer]["field_name"],
+                value=f"{self.get_city_template(city_key)['location']}\n<t:{prayer_timestamp}:t>",
+                inline=True
+            )
+        return embed
+    
+    # Group alerts that are due together into as few messages as the channel allows
+    def dispatch_alerts(self, channel_id, alerts):
+        chunks = []
+        chunk, mentions = [], set()
+        for alert in alerts:
+            subscribers = self.registry.get_subscribers(alert[0], alert[1])
+            if chunk and (len(chunk) >= self.MAX_ALERTS_PER_MESSAGE or len(mentions | subscribers) > self.MAX_MENTIONS):
+                chunks.append((chunk, mentions))
+                chunk, mentions = [], set()
+            chunk.append(alert)
+            mentions = mentions | subscribers
+        if chunk:
+            chunks.append((chunk, mentions))
+        
+        # Returns (future, alerts) pairs, the future resolving once the alerts' embed is sent
+        sends = []
+        for chunk, mentions in chunks:
+            embed = self.build_prayer_embed(*chunk[0]) if len(chunk) == 1 else self.build_combined_embed(chunk)
             
-            # Convert to city's timezone for comparison
-            city_timezone = pytz.timezone(city_info["timezone"])
-            city_current_time = current_time.astimezone(city_timezone)
-            
-            # Check each prayer time we're interested in
-            for prayer in ["Fajr", "Maghrib"]:
-                if self.cities[city_key]["prayers_notified"][prayer]:
-                    continue  # Skip if already notified today
-                
-                prayer_time_str = prayer_data[prayer]
-                prayer_hour, prayer_minute = map(int, prayer_time_str.split(':'))
-                
-                # Create a datetime object for the prayer time
-                prayer_datetime = city_current_time.replace(
-                    hour=prayer_hour, 
-                    minute=prayer_minute, 
-                    second=0, 
-                    microsecond=0
+            # A single alert can still have more subscribers than fit in one message
+            mentions = [f"<@{user_id}>" for user_id in sorted(mentions)]
+            for start in range(0, len(mentions), self.MAX_MENTIONS):
+                user_to_ping = " ".join(mentions[start:start + self.MAX_MENTIONS])
+                future = self.dispatcher.submit(
+                    channel_id,
+                    f"{user_to_ping}, it's time for prayer!",
+                    embed if start == 0 else None
                 )
-                
-                # Check if it's time to send the notification
-                time_diff = (prayer_datetime - city_current_time).total_seconds() / 60
-                
-                if abs(time_diff) < 1:  # Within 1 minute
-                    user_to_ping = f"<@{city_info['user_id']}>"
-                    
-                    # Get Unix timestamps for Discord timestamp formatting
-                    current_timestamp = int(city_current_time.timestamp())
-                    prayer_timestamp = self.time_to_timestamp(prayer_time_str, prayer_data["date"], city_info["timezone"])
-                    
-                    # Get animated emoji or fallback to regular
-                    prayer_emoji = self.get_emoji(self.prayer_info[prayer]["animated_emoji_key"], self.prayer_info[prayer]["emoji"])
-                    clock_emoji = self.get_emoji("clock", "⏰")
-                    location_emoji = self.get_emoji("location", "📍")
-                    prayer_time_emoji = self.get_emoji("prayer", "⏳")
-                    test_emoji = self.get_emoji("99", "")  # Using your provided emoji
-                    
-                    # Create a cleanly formatted embedded message
-                    embed = discord.Embed(
-                        description=f"**{prayer_emoji} {prayer} Time {prayer_emoji}**",
-                        color=self.prayer_info[prayer]['color']
-                    )
-                    
-                    # Add location and time with Discord timestamp format
-                    embed.add_field(
-                        name="",
-                        value=f"{clock_emoji} **Current Time:** <t:{current_timestamp}:t>\n"
-                             f"{location_emoji} **Location:** {city_info['emoji']} {city_info['name']}, {city_info['country']}\n"
-                             f"{prayer_time_emoji} **Prayer Time:** <t:{prayer_timestamp}:t>\n"
-                             f"{test_emoji} Using your provided emoji",
-                        inline=False
-                    )
-                    
-                    # Add a nice footer with the date
-                    embed.set_footer(text=f"Date: {prayer_data['date']}")
-                    
-                    await channel.send(f"{user_to_ping}, it's time for prayer!", embed=embed)
-                    self.cities[city_key]["prayers_notified"][prayer] = True
-                    print(f"Notification sent for {prayer} in {city_info['name']}")
+                if start == 0:
+                    sends.append((future, chunk))
+        return sends
+    
+    # Journal alerts as their messages go out, with one fsync for the whole batch
+    async def journal_alerts(self, sends):
+        for future, alerts in sends:
+            if await future:
+                for city_key, prayer, date in alerts:
+                    self.journal.record(city_key, prayer, date)
+        await self.journal.flush()
+    
+    @tasks.loop()
+    async def check_prayer_times(self):
+        # Sleep until the next event is due, waking early if the schedule changes
+        self.schedule_changed.clear()
+        if not self.prayer_schedule or self.prayer_schedule[0][0] > time.time():
+            delay = self.prayer_schedule[0][0] - time.time() if self.prayer_schedule else None
+            try:
+                await asyncio.wait_for(self.schedule_changed.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            return
+        
+        # Pop every event that is due now
+        due_events = []
+        now = time.time()
+        while self.prayer_schedule and self.prayer_schedule[0][0] <= now:
+            due_events.append(heapq.heappop(self.prayer_schedule))
+        
+        # Group the due prayers by channel, so they go out as one message per channel
+        # One bad event is logged and skipped, it must never stop the scheduler
+        alerts_by_channel = {}
+        for fire_time, key, event, date in due_events:
+            self.scheduled_events.discard((key, event, date))
+            try:
+                if event == self.ROLLOVER:
+                    await self.rollover_timezone(key, date)
+                elif key not in self.cities:
+                    continue  # City was removed after the event was scheduled
+                elif event == self.RETRY:
+                    await self.schedule_city_day(key, date)
+                elif self.registry.get_subscribers(key, event) and not self.journal.is_sent(key, event, date):
+                    prayer_data = self.lookup_prayer_times(key, date)
+                    if not prayer_data or prayer_data[event] is None:
+                        print(f"No {event} time for {key} on {date}, skipping the alert")
+                        continue
+                    channel_id = self.cities[key].get("channel_id", self.CHANNEL_ID)
+                    alerts_by_channel.setdefault(channel_id, []).append((key, event, date))
+            except Exception as e:
+                print(f"Error processing prayer event {event!r} for {key} on {date}: {e}")
+        
+        # Channels are sent to concurrently by the dispatcher
+        sends = []
+        for channel_id, alerts in alerts_by_channel.items():
+            try:
+                sends.extend(self.dispatch_alerts(channel_id, alerts))
+            except Exception as e:
+                print(f"Error queueing prayer notifications for channel {channel_id}: {e}")
+                continue
+            print(f"Queued {len(alerts)} prayer notification(s) for channel {channel_id}")
+        if sends:
+            journal_task = asyncio.create_task(self.journal_alerts(sends))
+            self.journal_tasks.add(journal_task)
+            journal_task.add_done_callback(self.journal_tasks.discard)
     
     @check_prayer_times.before_loop
     async def before_check_prayer_times(self):
         await self.bot.wait_until_ready()
+        
+        # Arm today's events for every subscribed city
+        self.prayer_schedule = []
+        self.scheduled_events = set()
+        self.armed_timezones = set()
+        await self.warm_timetables(datetime.datetime.now(datetime.timezone.utc))
+        for city_key in self.registry.get_active_cities():
+            await self.arm_city(city_key)
+    
+    @tasks.loop(hours=1)
+    async def refresh_timetables(self):
+        current_time = datetime.datetime.now(datetime.timezone.utc)
+        self.evict_expired_timetables(current_time)
+        
+        # Retry any month that failed to load, then fetch next month before the rollover
+        await self.warm_timetables(current_time, retry_fallback=True)
+        await self.warm_timetables(current_time + datetime.timedelta(days=self.PREFETCH_DAYS))
     
     @commands.command(name='gettime')
     async def get_time(self, ctx):
         # Create a cleaner, more spaced out embed
         embed = discord.Embed(
-            title=f"{self.get_emoji('99', '🕌')} Today's Prayer Times {self.get_emoji('99', '🕌')}",
+            title=self.gettime_title,
             color=0x2ecc71,  # Green color
             description="Prayer times for your locations today:"
         )
         
-        for city_key, city_info in self.cities.items():
-            prayer_data = self.get_prayer_times(city_info["name"], city_info["country"])
+        # Show the caller's cities, or every city when they have no subscriptions (embeds hold 25 fields)
+        city_keys = sorted(self.registry.get_user_cities(ctx.author.id)) or list(self.cities)
+        city_keys = city_keys[:25]
+        
+        # Load any month that is still missing, then answer from memory
+        current_time = datetime.datetime.now(datetime.timezone.utc)
+        await self.warm_timetables(current_time, city_keys)
+        all_prayer_data = self.get_all_prayer_times(city_keys, current_time)
+        
+        for city_key in city_keys:
+            city_info = self.cities[city_key]
+            prayer_data = all_prayer_data.get(city_key)
             
-            if prayer_data:
-                # Get Unix timestamps for prayer times
-                fajr_timestamp = self.time_to_timestamp(prayer_data["Fajr"], prayer_data["date"], city_info["timezone"])
-                maghrib_timestamp = self.time_to_timestamp(prayer_data["Maghrib"], prayer_data["date"], city_info["timezone"])
-                
-                # Get animated emojis for each prayer
-                fajr_emoji = self.get_emoji(self.prayer_info["Fajr"]["animated_emoji_key"], self.prayer_info["Fajr"]["emoji"])
-                maghrib_emoji = self.get_emoji(self.prayer_info["Maghrib"]["animated_emoji_key"], self.prayer_info["Maghrib"]["emoji"])
-                
-                # Format each city's prayer times with Discord timestamp format
+            if prayer_data and prayer_data["Fajr"] and prayer_data["Maghrib"]:
+                # Fill the precompiled template with Discord timestamps
                 embed.add_field(
-                    name=f"\n{city_info['emoji']} **{city_info['name']}, {city_info['country']}**",
-                    value=f"**Date:** {prayer_data['date']}\n\n"
-                         f"{fajr_emoji} **Fajr:** <t:{fajr_timestamp}:t>\n\n"
-                         f"{maghrib_emoji} **Maghrib:** <t:{maghrib_timestamp}:t>\n\n"
-                         f"{self.get_emoji('99', '')}\n\u200B",
+                    name=self.get_city_template(city_key)["heading"],
+                    value=self.gettime_template % (
+                        prayer_data["date"],
+                        self.time_to_timestamp(prayer_data["Fajr"], prayer_data["date"], city_info["timezone"]),
+                        self.time_to_timestamp(prayer_data["Maghrib"], prayer_data["date"], city_info["timezone"])
+                    ),
+                    inline=False
+                )
+            elif prayer_data:
+                embed.add_field(
+                    name=self.get_city_template(city_key)["location"],
+                    value="The sun does not reach Fajr or Maghrib here today.\n\u200B",
                     inline=False
                 )
             else:
                 embed.add_field(
-                    name=f"{city_info['emoji']} {city_info['name']}, {city_info['country']}",
+                    name=self.get_city_template(city_key)["location"],
                     value="Could not fetch prayer times.\n\u200B",
                     inline=False
                 )
@@ -249,5 +913,113 @@ class PrayerTimesCog(commands.Cog):
         
         await ctx.send(embed=embed)
 
+    # Parse prayer names case-insensitively, returns None if any name is unknown
+    def parse_prayers(self, prayers):
+        names = {prayer.lower(): prayer for prayer in self.PRAYERS}
+        parsed = [names.get(prayer.lower()) for prayer in prayers]
+        return None if None in parsed else parsed
+    
+    @commands.command(name='subscribe')
+    async def subscribe(self, ctx, city_key: str, *prayers):
+        """Subscribe to prayer notifications for a city (default: Fajr and Maghrib)"""
+        city_key = city_key.lower()
+        if city_key not in self.cities:
+            await ctx.send(f"❌ Unknown city `{city_key}`. Use `!cities` to see the available cities.")
+            return
+        
+        parsed = self.parse_prayers(prayers or ("Fajr", "Maghrib"))
+        if parsed is None:
+            await ctx.send(f"❌ Unknown prayer. Choose from: {', '.join(self.PRAYERS)}")
+            return
+        
+        self.registry.subscribe(city_key, ctx.author.id, parsed)
+        await self.arm_city(city_key)
+        await ctx.send(f"🔔 Subscribed to {', '.join(parsed)} in {self.cities[city_key]['name']}.")
+    
+    @commands.command(name='unsubscribe')
+    async def unsubscribe(self, ctx, city_key: str, *prayers):
+        """Unsubscribe from prayer notifications for a city (default: all prayers)"""
+        city_key = city_key.lower()
+        parsed = self.parse_prayers(prayers) if prayers else None
+        if prayers and parsed is None:
+            await ctx.send(f"❌ Unknown prayer. Choose from: {', '.join(self.PRAYERS)}")
+            return
+        
+        removed = self.registry.unsubscribe(city_key, ctx.author.id, parsed) if city_key in self.cities else set()
+        if removed:
+            await ctx.send(f"🔕 Unsubscribed from {', '.join(sorted(removed))} in {self.cities[city_key]['name']}.")
+        else:
+            await ctx.send(f"❌ You are not subscribed to those prayers in `{city_key}`.")
+    
+    @commands.command(name='cities')
+    async def list_cities(self, ctx):
+        """List the cities available for prayer notifications"""
+        lines = [
+            f"`{city_key}` {city_info['emoji']} {city_info['name']}, {city_info['country']} "
+            f"({len(self.registry.subscriptions[city_key])} subscribers)"
+            for city_key, city_info in sorted(self.cities.items())
+        ]
+        
+        # Keep within Discord's embed description limit
+        description = ""
+        for line in lines:
+            if len(description) + len(line) > 4000:
+                description += "…"
+                break
+            description += line + "\n"
+        
+        embed = discord.Embed(title="🌍 Prayer Cities", description=description or "No cities configured.", color=0x2ecc71)
+        await ctx.send(embed=embed)
+    
+    @commands.command(name='addcity')
+    @commands.is_owner()
+    async def add_city(self, ctx, city_key: str, timezone: str, latitude: float, longitude: float, country: str, *, name: str):
+        """Add a city, e.g. !addcity reggio Europe/Rome 44.6989 10.6297 Italy Reggio Emilia"""
+        if not timezones.is_valid_zone(timezone):
+            await ctx.send(f"❌ Unknown timezone `{timezone}`.")
+            return
+        
+        city_key = city_key.lower()
+        updated = city_key in self.cities
+        self.city_templates.pop(city_key, None)
+        self.registry.add_city(city_key, {
+            "name": name,
+            "country": country,
+            "timezone": timezone,
+            "latitude": latitude,
+            "longitude": longitude,
+            "emoji": "📍"
+        })
+        if updated:
+            # Subscribers carry over, so their prayers are rescheduled for the new settings
+            await self.reload_city(city_key)
+            await ctx.send(f"🟢 Updated `{city_key}` to {name}, {country}.")
+        else:
+            await ctx.send(f"🟢 Added {name}, {country} as `{city_key}`.")
+    
+    @commands.command(name='removecity')
+    @commands.is_owner()
+    async def remove_city(self, ctx, city_key: str):
+        """Remove a city and all of its subscriptions"""
+        city_key = city_key.lower()
+        if city_key not in self.cities:
+            await ctx.send(f"❌ Unknown city `{city_key}`.")
+            return
+        
+        city_info = self.cities[city_key]
+        self.registry.remove_city(city_key)
+        self.city_templates.pop(city_key, None)
+        # A city added later under the same key must not inherit its tables or events
+        self.forget_city(city_key)
+        await ctx.send(f"🔴 Removed {city_info['name']}, {city_info['country']}.")
+
+    @commands.command(name='setemoji')
+    @commands.is_owner()
+    async def set_emoji(self, ctx, key: str, emoji_id: str):
+        """Set the animated emoji ID used for a key, e.g. !setemoji fajr 1304880064160338021"""
+        self.animated_emojis[key] = emoji_id
+        self.compile_templates()
+        await ctx.send(f"🟢 Emoji `{key}` set to {self.get_emoji(key, emoji_id)}.")
+
 async def setup(bot):
     await bot.add_cog(PrayerTimesCog(bot))
\ No newline at end of file
@@ -1,54 +1,179 @@
 import discord
 from discord.ext import commands, tasks
-import json
 import datetime
 import asyncio
 import random
+import time
 from discord.ui import Button, View
 import os
+from utils.task_storage import WriteBehind, open_task_storage, repair_task_ids
 
-# Check if tasks.json exists, if not create it
-if not os.path.exists('tasks.json'):
-    with open('tasks.json', 'w') as f:
-        json.dump({}, f)
+class Task:
+    __slots__ = ("id", "name", "completed")
 
-# Load tasks from file
-def load_tasks():
-    try:
-        with open('tasks.json', 'r') as f:
-            return json.load(f)
-    except:
-        return {}
+    def __init__(self, task_id, name, completed=False):
+        self.id = task_id
+        self.name = name
+        self.completed = completed
+
+    def to_dict(self):
+        return {"name": self.name, "completed": self.completed, "id": self.id}
+
+class ChannelTasks:
+    """A channel's tasks and schedule, indexed by id and by completion state
+
+    `tasks` keeps the list order used for display and distribution. Ids come from the
+    channel's own `next_id` counter and are never reused, so `slots` can be a plain list
+    indexed by id, holding None for removed tasks. It and the `completed` / `incomplete`
+    sets are updated on every change, so looking up a task or checking whether everything
+    is done never scans the list.
+    """
+    __slots__ = ("tasks", "slots", "completed", "incomplete", "days", "setup_mode",
+                 "daily_tasks", "current_day", "start_date", "next_id")
+
+    def __init__(self, days=0, setup_mode=False):
+        self.tasks = []
+        self.slots = [None]  # Ids start at 1
+        self.completed = set()
+        self.incomplete = set()
+        self.days = days
+        self.setup_mode = setup_mode
+        self.daily_tasks = {}  # {"day1": [task_ids], "day2": [task_ids]}
+        self.current_day = 0
+        self.start_date = None
+        self.next_id = 1
+
+    @classmethod
+    def from_dict(cls, data):
+        channel = cls(data.get("days", 0), data.get("setup_mode", False))
+        channel.daily_tasks = data.get("daily_tasks", {})
+        channel.current_day = data.get("current_day", 0)
+        channel.start_date = data.get("start_date")
+        channel.next_id = data.get("next_id", 1)
+        for task in data.get("tasks", []):
+            channel._insert(Task(task["id"], task["name"], task.get("completed", False)))
+        return channel
+
+    def to_dict(self):
+        return {
+            "tasks": [task.to_dict() for task in self.tasks],
+            "days": self.days,
+            "setup_mode": self.setup_mode,
+            "daily_tasks": self.daily_tasks,
+            "current_day": self.current_day,
+            "start_date": self.start_date,
+            "next_id": self.next_id
+        }
+
+    # An empty channel that keeps counting ids from here, so a view still open on an old task
+    # can never match a new one
+    def cleared(self):
+        channel = ChannelTasks()
+        channel.next_id = self.next_id
+        return channel
+
+    def _insert(self, task):
+        self.tasks.append(task)
+        if task.id >= len(self.slots):
+            self.slots.extend([None] * (task.id + 1 - len(self.slots)))
+        self.slots[task.id] = task
+        (self.completed if task.completed else self.incomplete).add(task)
 
-# Save tasks to file
-def save_tasks(tasks_data):
-    with open('tasks.json', 'w') as f:
-        json.dump(tasks_data, f, indent=4)
+    def add(self, name):
+        task = Task(self.next_id, name)
+        self.next_id += 1
+        self._insert(task)
+        return task
+
+    def get(self, task_id):
+        if 0 < task_id < len(self.slots):
+            return self.slots[task_id]
+        return None
+
+    def remove(self, task_id):
+        task = self.get(task_id)
+        if task is None:
+            return None
+        self.slots[task_id] = None
+        self.tasks.remove(task)
+        self.completed.discard(task)
+        self.incomplete.discard(task)
+        return task
+
+    def set_completed(self, task, completed):
+        (self.completed if task.completed else self.incomplete).discard(task)
+        task.completed = completed
+        (self.completed if completed else self.incomplete).add(task)
+
+    def get_day_tasks(self, day):
+        """Tasks scheduled for a day, skipping any removed since the schedule was made"""
+        tasks = (self.get(task_id) for task_id in self.daily_tasks.get(f"day{day}", []))
+        return [task for task in tasks if task]
+
+    def is_complete(self):
+        return not self.incomplete
+
+# Load tasks from the storage backend, with the ids of channels whose task ids had to be repaired
+def load_tasks(storage):
+    try:
+        data = storage.load()
+    except Exception as e:
+        print(f"Error loading tasks: {e}")
+        return {}, []
+    repaired = [channel_id for channel_id, channel_data in data.items() if repair_task_ids(channel_data)]
+    if repaired:
+        print(f"Repaired task ids in {len(repaired)} channels")
+    return {channel_id: ChannelTasks.from_dict(channel_data) for channel_id, channel_data in data.items()}, repaired
 
 class TaskManagement(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.tasks_data = load_tasks()
-        # Format: {channel_id: {
+        self.TASK_STORAGE = os.environ.get('TASK_STORAGE', 'sqlite')  # "sqlite", "json" (legacy tasks.json) or "oplog"
+        self.storage = open_task_storage(self.TASK_STORAGE)
+        self.tasks_data, repaired = load_tasks(self.storage)
+        self.SAVE_INTERVAL = 2  # Seconds a burst of changes is collected before one write
+        self.persistence = WriteBehind(self.storage, self.get_channel_dict, self.SAVE_INTERVAL)
+        # Store repaired channels once, so the repair never has to run again
+        for channel_id in repaired:
+            self.record(channel_id, "repair", channel=self.tasks_data[channel_id].to_dict())
+        # Format: {channel_id: ChannelTasks}, stored as {channel_id: {
         #   "tasks": [{"name": "Task name", "completed": False, "id": 1}],
         #   "days": 5,
         #   "setup_mode": False,
         #   "daily_tasks": {"day1": [task_ids], "day2": [task_ids]},
         #   "current_day": 1,
-        #   "start_date": "2025-03-19"
+        #   "start_date": "2025-03-19",
+        #   "next_id": 2
         # }}
         self.setup_users = {}  # Users currently in setup mode
         self.daily_reminder.start()
         self.evening_check.start()
 
+    async def cog_unload(self):
+        self.daily_reminder.cancel()
+        self.evening_check.cancel()
+        # Flush pending changes, then wait for queued writes to finish before closing
+        await self.persistence.close()
+        await asyncio.to_thread(self.storage.close)
+
+    def get_channel_dict(self, channel_id):
+        channel_data = self.tasks_data.get(channel_id)
+        return channel_data.to_dict() if channel_data else None
+
+    def record(self, channel_id, op, by=None, **fields):
+        """Queue an op-log entry for a change already made to tasks_data; the write-behind flush persists it"""
+        entry = {"op": op, "at": int(time.time()), **fields}
+        if by is not None:
+            entry["by"] = by
+        self.persistence.record(str(channel_id), entry)
+
     async def distribute_tasks(self, channel_id):
         """Distribute tasks evenly across the specified days"""
-        channel_data = self.tasks_data.get(str(channel_id), {})
-        tasks = channel_data.get("tasks", [])
-        days = channel_data.get("days", 1)
+        channel_data = self.tasks_data.setdefault(str(channel_id), ChannelTasks(days=1))
+        days = channel_data.days
         
-        # Only distribute tasks that are not completed
-        incomplete_tasks = [task for task in tasks if not task["completed"]]
+        # Only distribute tasks that are not completed, in list order
+        incomplete_tasks = [task for task in channel_data.tasks if not task.completed]
         
         # Reset daily tasks distribution
         daily_tasks = {}
@@ -57,7 +182,7 @@ class TaskManagement(commands.Cog):
         if len(incomplete_tasks) < days:
             # Distribute one task per day until we run out of tasks
             for day in range(1, len(incomplete_tasks) + 1):
-                daily_tasks[f"day{day}"] = [incomplete_tasks[day-1]["id"]]
+                daily_tasks[f"day{day}"] = [incomplete_tasks[day-1].id]
             
             # Add break days for the remaining days
             for day in range(len(incomplete_tasks) + 1, days + 1):
@@ -74,15 +199,14 @@ class TaskManagement(commands.Cog):
                     end_idx += 1
                     remainder -= 1
                     
-                daily_tasks[f"day{day}"] = [task["id"] for task in incomplete_tasks[start_idx:end_idx]]
+                daily_tasks[f"day{day}"] = [task.id for task in incomplete_tasks[start_idx:end_idx]]
                 start_idx = end_idx
         
         # Update the tasks data
-        channel_data["daily_tasks"] = daily_tasks
-        channel_data["current_day"] = 1
-        channel_data["start_date"] = datetime.datetime.now().strftime("%Y-%m-%d")
-        self.tasks_data[str(channel_id)] = channel_data
-        save_tasks(self.tasks_data)
+        channel_data.daily_tasks = daily_tasks
+        channel_data.current_day = 1
+        channel_data.start_date = datetime.datetime.now().strftime("%Y-%m-%d")
+        self.record(channel_id, "distribute", daily_tasks=daily_tasks, start_date=channel_data.start_date)
 
     @commands.command(name="setup")
     async def setup(self, ctx):
@@ -91,18 +215,11 @@ class TaskManagement(commands.Cog):
         
         # Initialize tasks for the channel
         if channel_id not in self.tasks_data:
-            self.tasks_data[channel_id] = {
-                "tasks": [],
-                "days": 0,
-                "setup_mode": True,
-                "daily_tasks": {},
-                "current_day": 0,
-                "start_date": None
-            }
+            self.tasks_data[channel_id] = ChannelTasks(setup_mode=True)
         else:
-            self.tasks_data[channel_id]["setup_mode"] = True
+            self.tasks_data[channel_id].setup_mode = True
         
-        save_tasks(self.tasks_data)
+        self.record(channel_id, "setup", by=ctx.author.id)
         
         # Start the setup process
         self.setup_users[ctx.author.id] = {"channel_id": channel_id, "stage": "tasks"}
@@ -151,13 +268,8 @@ class TaskManagement(commands.Cog):
                 content = message.content.strip()
                 
                 # Add the task
-                task_id = len(self.tasks_data[str(channel_id)]["tasks"]) + 1
-                self.tasks_data[str(channel_id)]["tasks"].append({
-                    "name": content,
-                    "completed": False,
-                    "id": task_id
-                })
-                save_tasks(self.tasks_data)
+                task = self.tasks_data[str(channel_id)].add(content)
+                self.record(channel_id, "add", by=user_id, task=task.to_dict())
                 
                 embed = discord.Embed(
                     title="✅ Task Added",
@@ -176,9 +288,9 @@ class TaskManagement(commands.Cog):
                         raise ValueError("Days must be greater than 0")
                     
                     # Update the days
-                    self.tasks_data[str(channel_id)]["days"] = days
-                    self.tasks_data[str(channel_id)]["setup_mode"] = False
-                    save_tasks(self.tasks_data)
+                    self.tasks_data[str(channel_id)].days = days
+                    self.tasks_data[str(channel_id)].setup_mode = False
+                    self.record(channel_id, "days", by=user_id, days=days)
                     
                     # Distribute tasks
                     await self.distribute_tasks(channel_id)
@@ -205,10 +317,10 @@ class TaskManagement(commands.Cog):
 
     async def show_task_list(self, channel, channel_id):
         """Show the task list for a channel"""
-        channel_data = self.tasks_data.get(str(channel_id), {})
-        tasks = channel_data.get("tasks", [])
-        days = channel_data.get("days", 0)
-        current_day = channel_data.get("current_day", 0)
+        channel_data = self.tasks_data.get(str(channel_id)) or ChannelTasks()
+        tasks = channel_data.tasks
+        days = channel_data.days
+        current_day = channel_data.current_day
         
         if not tasks:
             embed = discord.Embed(
@@ -229,22 +341,20 @@ class TaskManagement(commands.Cog):
         # Add tasks
         tasks_text = ""
         for task in tasks:
-            status = "✅" if task["completed"] else "❌"
-            tasks_text += f"{task['id']}. {status} {task['name']}\n"
+            status = "✅" if task.completed else "❌"
+            tasks_text += f"{task.id}. {status} {task.name}\n"
         
         embed.add_field(name="Tasks", value=tasks_text or "No tasks", inline=False)
         
         # Add daily tasks if available
-        daily_tasks = channel_data.get("daily_tasks", {})
+        daily_tasks = channel_data.daily_tasks
         if daily_tasks and current_day > 0:
             today_tasks = daily_tasks.get(f"day{current_day}", [])
             if today_tasks:
                 today_tasks_text = ""
-                for task_id in today_tasks:
-                    task = next((t for t in tasks if t["id"] == task_id), None)
-                    if task:
-                        status = "✅" if task["completed"] else "❌"
-                        today_tasks_text += f"{task_id}. {status} {task['name']}\n"
+                for task in channel_data.get_day_tasks(current_day):
+                    status = "✅" if task.completed else "❌"
+                    today_tasks_text += f"{task.id}. {status} {task.name}\n"
                 
                 embed.add_field(name="Today's Tasks", value=today_tasks_text, inline=False)
             else:
@@ -264,26 +374,14 @@ class TaskManagement(commands.Cog):
         channel_id = str(ctx.channel.id)
         
         if channel_id not in self.tasks_data:
-            self.tasks_data[channel_id] = {
-                "tasks": [],
-                "days": 0,
-                "setup_mode": False,
-                "daily_tasks": {},
-                "current_day": 0,
-                "start_date": None
-            }
+            self.tasks_data[channel_id] = ChannelTasks()
         
         # Add the task
-        task_id = len(self.tasks_data[channel_id]["tasks"]) + 1
-        self.tasks_data[channel_id]["tasks"].append({
-            "name": task_name,
-            "completed": False,
-            "id": task_id
-        })
-        save_tasks(self.tasks_data)
+        task = self.tasks_data[channel_id].add(task_name)
+        self.record(channel_id, "add", by=ctx.author.id, task=task.to_dict())
         
         # If days are set, redistribute tasks
-        if self.tasks_data[channel_id]["days"] > 0:
+        if self.tasks_data[channel_id].days > 0:
             await self.distribute_tasks(channel_id)
         
         embed = discord.Embed(
@@ -307,20 +405,18 @@ class TaskManagement(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        tasks = self.tasks_data[channel_id]["tasks"]
-        task = next((t for t in tasks if t["id"] == task_id), None)
+        task = self.tasks_data[channel_id].remove(task_id)
         
         if task:
-            self.tasks_data[channel_id]["tasks"].remove(task)
-            save_tasks(self.tasks_data)
+            self.record(channel_id, "remove", by=ctx.author.id, id=task_id, name=task.name)
             
             # If days are set, redistribute tasks
-            if self.tasks_data[channel_id]["days"] > 0:
+            if self.tasks_data[channel_id].days > 0:
                 await self.distribute_tasks(channel_id)
             
             embed = discord.Embed(
                 title="🗑️ Task Removed",
-                description=f"Task `{task['name']}` has been removed.",
+                description=f"Task `{task.name}` has been removed.",
                 color=discord.Color.green()
             )
             await ctx.send(embed=embed)
@@ -347,15 +443,8 @@ class TaskManagement(commands.Cog):
             return
         
         # Reset all data for this channel
-        self.tasks_data[channel_id] = {
-            "tasks": [],
-            "days": 0,
-            "setup_mode": False,
-            "daily_tasks": {},
-            "current_day": 0,
-            "start_date": None
-        }
-        save_tasks(self.tasks_data)
+        self.tasks_data[channel_id] = self.tasks_data[channel_id].cleared()
+        self.record(channel_id, "reset", by=ctx.author.id)
         
         # Remove any users in setup mode for this channel
         users_to_remove = []
@@ -374,32 +463,80 @@ class TaskManagement(commands.Cog):
         )
         await ctx.send(embed=embed)
 
+    @commands.command(name="taskhistory")
+    async def task_history(self, ctx, limit: int = 15):
+        """Show who changed this channel's tasks and when"""
+        channel_id = str(ctx.channel.id)
+        limit = min(max(limit, 1), 50)
+        
+        # Make sure recent changes are on disk before reading the log
+        await self.persistence.flush()
+        history = await asyncio.to_thread(self.storage.read_history, channel_id, limit)
+        if history is None:
+            embed = discord.Embed(
+                title="❌ Error",
+                description="Task history needs the op-log storage backend (`TASK_STORAGE=oplog`).",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        lines = []
+        for op in history:
+            who = f"<@{op['by']}>" if "by" in op else "Bot"
+            names = ", ".join(f"`{name}`" for name in op.get("names", []))
+            if op["op"] == "add":
+                action = f"➕ {who} added `{op['task']['name']}`"
+            elif op["op"] == "remove":
+                action = f"🗑️ {who} removed `{op.get('name', op['id'])}`"
+            elif op["op"] == "complete" and op["completed"]:
+                action = f"✅ {who} completed {names}"
+            elif op["op"] == "complete":
+                action = f"❌ {who} marked {names} as not completed"
+            elif op["op"] == "setup":
+                action = f"📋 {who} started setup"
+            elif op["op"] == "days":
+                action = f"📅 {who} set {op['days']} days"
+            elif op["op"] == "distribute":
+                action = "🔀 Tasks distributed across the days"
+            elif op["op"] == "advance":
+                action = f"➡️ Moved to day {op['day']}"
+            elif op["op"] == "repair":
+                action = "🔧 Task IDs were repaired"
+            else:
+                action = f"🧹 {who} cleared the tasks"
+            lines.append(f"<t:{op['at']}:f> {action}")
+        
+        embed = discord.Embed(
+            title="📜 Task History",
+            description="\n".join(lines)[:4000] or "No changes recorded yet.",
+            color=discord.Color.blue()
+        )
+        await ctx.send(embed=embed)
+
     @tasks.loop(minutes=1)
     async def daily_reminder(self):
         """Send daily task reminders at 6 UTC"""
         now = datetime.datetime.utcnow()
         if now.hour == 6 and now.minute == 0:
             for channel_id, channel_data in self.tasks_data.items():
-                if channel_data.get("current_day", 0) > 0:
+                if channel_data.current_day > 0:
                     channel = self.bot.get_channel(int(channel_id))
                     if channel:
-                        daily_tasks = channel_data.get("daily_tasks", {})
-                        current_day = channel_data.get("current_day", 0)
-                        today_tasks = daily_tasks.get(f"day{current_day}", [])
+                        current_day = channel_data.current_day
+                        today_tasks = channel_data.daily_tasks.get(f"day{current_day}", [])
                         
                         embed = discord.Embed(
                             title="📅 Today's Tasks",
-                            description=f"Day {current_day}/{channel_data.get('days', 0)}",
+                            description=f"Day {current_day}/{channel_data.days}",
                             color=discord.Color.blue()
                         )
                         
                         if today_tasks:
                             tasks_text = ""
-                            for task_id in today_tasks:
-                                task = next((t for t in channel_data["tasks"] if t["id"] == task_id), None)
-                                if task:
-                                    status = "✅" if task["completed"] else "❌"
-                                    tasks_text += f"{task_id}. {status} {task['name']}\n"
+                            for task in channel_data.get_day_tasks(current_day):
+                                status = "✅" if task.completed else "❌"
+                                tasks_text += f"{task.id}. {status} {task.name}\n"
                             
                             embed.add_field(name="Tasks", value=tasks_text, inline=False)
                         else:
@@ -413,12 +550,11 @@ class TaskManagement(commands.Cog):
         now = datetime.datetime.utcnow()
         if now.hour == 22 and now.minute == 0:
             for channel_id, channel_data in self.tasks_data.items():
-                if channel_data.get("current_day", 0) > 0:
+                if channel_data.current_day > 0:
                     channel = self.bot.get_channel(int(channel_id))
                     if channel:
-                        daily_tasks = channel_data.get("daily_tasks", {})
-                        current_day = channel_data.get("current_day", 0)
-                        today_tasks = daily_tasks.get(f"day{current_day}", [])
+                        current_day = channel_data.current_day
+                        today_tasks = channel_data.daily_tasks.get(f"day{current_day}", [])
                         
                         if today_tasks:
                             # Create a view with buttons
@@ -431,11 +567,9 @@ class TaskManagement(commands.Cog):
                             )
                             
                             tasks_text = ""
-                            for task_id in today_tasks:
-                                task = next((t for t in channel_data["tasks"] if t["id"] == task_id), None)
-                                if task:
-                                    status = "✅" if task["completed"] else "❌"
-                                    tasks_text += f"{task_id}. {status} {task['name']}\n"
+                            for task in channel_data.get_day_tasks(current_day):
+                                status = "✅" if task.completed else "❌"
+                                tasks_text += f"{task.id}. {status} {task.name}\n"
                             
                             embed.add_field(name="Today's Tasks", value=tasks_text, inline=False)
                             await channel.send(embed=embed, view=view)
@@ -458,13 +592,13 @@ class TaskManagement(commands.Cog):
 
     async def check_completion(self, channel_id):
         """Check if all tasks are completed"""
-        channel_data = self.tasks_data.get(str(channel_id), {})
-        tasks = channel_data.get("tasks", [])
-        days = channel_data.get("days", 0)
-        current_day = channel_data.get("current_day", 0)
+        channel_data = self.tasks_data.get(str(channel_id)) or ChannelTasks()
+        tasks = channel_data.tasks
+        days = channel_data.days
+        current_day = channel_data.current_day
         
         # Check if all tasks are completed
-        all_completed = all(task["completed"] for task in tasks)
+        all_completed = channel_data.is_complete()
         
         # Check if we've reached the end of the days
         end_of_days = current_day >= days
@@ -475,40 +609,34 @@ class TaskManagement(commands.Cog):
             if channel:
                 embed = discord.Embed(
                     title="📊 Task Completion Report",
-                    description=f"Period: {channel_data.get('start_date', 'Unknown')} to {datetime.datetime.now().strftime('%Y-%m-%d')}",
+                    description=f"Period: {channel_data.start_date or 'Unknown'} to {datetime.datetime.now().strftime('%Y-%m-%d')}",
                     color=discord.Color.purple()
                 )
                 
-                completed_tasks = [task for task in tasks if task["completed"]]
-                incompleted_tasks = [task for task in tasks if not task["completed"]]
+                completed_tasks = [task for task in tasks if task.completed]
+                incompleted_tasks = [task for task in tasks if not task.completed]
                 
                 if completed_tasks:
-                    completed_text = "\n".join([f"{task['id']}. {task['name']}" for task in completed_tasks])
+                    completed_text = "\n".join([f"{task.id}. {task.name}" for task in completed_tasks])
                     embed.add_field(name="✅ Completed Tasks", value=completed_text, inline=False)
                 else:
                     embed.add_field(name="✅ Completed Tasks", value="None", inline=False)
                 
                 if incompleted_tasks:
-                    incompleted_text = "\n".join([f"{task['id']}. {task['name']}" for task in incompleted_tasks])
+                    incompleted_text = "\n".join([f"{task.id}. {task.name}" for task in incompleted_tasks])
                     embed.add_field(name="❌ Incompleted Tasks", value=incompleted_text, inline=False)
                 else:
                     embed.add_field(name="❌ Incompleted Tasks", value="None", inline=False)
                 
-                completion_rate = len(completed_tasks) / len(tasks) * 100 if tasks else 0
+                completion_rate = len(channel_data.completed) / len(tasks) * 100 if tasks else 0
                 embed.add_field(name="📈 Completion Rate", value=f"{completion_rate:.1f}%", inline=False)
                 
                 await channel.send(embed=embed)
                 
                 # Reset the tasks
-                self.tasks_data[str(channel_id)] = {
-                    "tasks": [],
-                    "days": 0,
-                    "setup_mode": False,
-                    "daily_tasks": {},
-                    "current_day": 0,
-                    "start_date": None
-                }
-                save_tasks(self.tasks_data)
+                current = self.tasks_data.get(str(channel_id), channel_data)
+                self.tasks_data[str(channel_id)] = current.cleared()
+                self.record(channel_id, "reset")
             
             return True
         
@@ -516,14 +644,14 @@ class TaskManagement(commands.Cog):
 
     async def advance_day(self, channel_id):
         """Advance to the next day"""
-        channel_data = self.tasks_data.get(str(channel_id), {})
-        current_day = channel_data.get("current_day", 0)
-        days = channel_data.get("days", 0)
-        
-        if current_day < days:
-            channel_data["current_day"] = current_day + 1
-            self.tasks_data[str(channel_id)] = channel_data
-            save_tasks(self.tasks_data)
+        channel_data = self.tasks_data.get(str(channel_id))
+        if channel_data is None:
+            return False
+        current_day = channel_data.current_day
+        
+        if current_day < channel_data.days:
+            channel_data.current_day = current_day + 1
+            self.record(channel_id, "advance", day=current_day + 1)
             
             # Check if all tasks are now completed
             await self.check_completion(channel_id)
@@ -542,15 +670,17 @@ class TaskCompletionView(View):
     @discord.ui.button(label="Yes", style=discord.ButtonStyle.green)
     async def yes_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         # Mark all tasks as completed
-        channel_data = self.cog.tasks_data.get(str(self.channel_id), {})
-        tasks = channel_data.get("tasks", [])
+        channel_data = self.cog.tasks_data.get(str(self.channel_id)) or ChannelTasks()
         
+        completed = []
         for task_id in self.today_tasks:
-            task = next((t for t in tasks if t["id"] == task_id), None)
+            task = channel_data.get(task_id)
             if task:
-                task["completed"] = True
+                channel_data.set_completed(task, True)
+                completed.append(task)
         
-        save_tasks(self.cog.tasks_data)
+        self.cog.record(self.channel_id, "complete", by=interaction.user.id, completed=True,
+                        ids=[task.id for task in completed], names=[task.name for task in completed])
         
         # Advance to the next day
         advanced = await self.cog.advance_day(self.channel_id)
@@ -568,14 +698,13 @@ class TaskCompletionView(View):
         await interaction.response.send_message("Let's mark the tasks you've completed.")
         
         # Create buttons for each task
-        channel_data = self.cog.tasks_data.get(str(self.channel_id), {})
-        tasks = channel_data.get("tasks", [])
+        channel_data = self.cog.tasks_data.get(str(self.channel_id)) or ChannelTasks()
         
         for task_id in self.today_tasks:
-            task = next((t for t in tasks if t["id"] == task_id), None)
+            task = channel_data.get(task_id)
             if task:
                 view = TaskIndividualCompletionView(self.cog, self.channel_id, task_id)
-                await interaction.followup.send(f"Did you complete: {task['name']}?", view=view)
+                await interaction.followup.send(f"Did you complete: {task.name}?", view=view)
         
         # Add a done button
         view = TaskCompletionDoneView(self.cog, self.channel_id)
@@ -593,15 +722,15 @@ class TaskIndividualCompletionView(View):
     @discord.ui.button(label="Yes", style=discord.ButtonStyle.green)
     async def yes_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         # Mark the task as completed
-        channel_data = self.cog.tasks_data.get(str(self.channel_id), {})
-        tasks = channel_data.get("tasks", [])
+        channel_data = self.cog.tasks_data.get(str(self.channel_id)) or ChannelTasks()
         
-        task = next((t for t in tasks if t["id"] == self.task_id), None)
+        task = channel_data.get(self.task_id)
         if task:
-            task["completed"] = True
-            save_tasks(self.cog.tasks_data)
+            channel_data.set_completed(task, True)
+            self.cog.record(self.channel_id, "complete", by=interaction.user.id, completed=True,
+                            ids=[task.id], names=[task.name])
             
-            await interaction.response.send_message(f"Task '{task['name']}' marked as completed.")
+            await interaction.response.send_message(f"Task '{task.name}' marked as completed.")
         else:
             await interaction.response.send_message("Task not found.")
         
@@ -610,15 +739,15 @@ class TaskIndividualCompletionView(View):
     @discord.ui.button(label="No", style=discord.ButtonStyle.red)
     async def no_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         # Keep the task as not completed
-        channel_data = self.cog.tasks_data.get(str(self.channel_id), {})
-        tasks = channel_data.get("tasks", [])
+        channel_data = self.cog.tasks_data.get(str(self.channel_id)) or ChannelTasks()
         
-        task = next((t for t in tasks if t["id"] == self.task_id), None)
+        task = channel_data.get(self.task_id)
         if task:
-            task["completed"] = False
-            save_tasks(self.cog.tasks_data)
+            channel_data.set_completed(task, False)
+            self.cog.record(self.channel_id, "complete", by=interaction.user.id, completed=False,
+                            ids=[task.id], names=[task.name])
             
-            await interaction.response.send_message(f"Task '{task['name']}' marked as not completed.")
+            await interaction.response.send_message(f"Task '{task.name}' marked as not completed.")
         else:
             await interaction.response.send_message("Task not found.")
         
@@ -0,0 +1,58 @@
+"""Compare the streaming state-blob reader with the old read-everything-and-regex scraper
+
+Run from the repository root with `python -m tests.bench_tiktok_profile`. Uses the saved
+profile pages in tests/fixtures, so no network is needed; bytes read is what a real
+response would download.
+"""
+import asyncio
+import re
+import time
+
+from tests.test_tiktok_profile import FakeContent, load_fixture
+from utils import tiktok_profile
+
+FIXTURES = ("tiktok_universal.html", "tiktok_sigi.html", "tiktok_no_state.html")
+ROUNDS = 200
+
+# The scraper before the streaming reader: decode the whole page, then search the text
+FOLLOWERS_PATTERN = re.compile(r'(\d+(?:,\d+)*)\s*Followers')
+LIKES_PATTERN = re.compile(r'(\d+(?:,\d+)*)\s*Likes')
+
+
+def regex_scrape(page):
+    html = page.decode('utf-8')
+    followers_match = FOLLOWERS_PATTERN.search(html)
+    likes_match = LIKES_PATTERN.search(html)
+    followers = int(followers_match.group(1).replace(',', '')) if followers_match else 0
+    likes = int(likes_match.group(1).replace(',', '')) if likes_match else 0
+    return {"followers": followers, "likes": likes}, len(page)
+
+
+async def stream_scrape(page):
+    blob, bytes_read = await tiktok_profile.read_state_blob(FakeContent(page))
+    return (tiktok_profile.extract_stats(blob) if blob else None), bytes_read
+
+
+async def time_async(scrape, page):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = await scrape(page)
+    return result, (time.perf_counter() - start) / ROUNDS
+
+
+async def main():
+    for name in FIXTURES:
+        page = load_fixture(name)
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            (old_stats, old_read) = regex_scrape(page)
+        old_time = (time.perf_counter() - start) / ROUNDS
+        (new_stats, new_read), new_time = await time_async(stream_scrape, page)
+
+        print(f"{name} ({len(page):,} bytes)")
+        print(f"  regex:  read {old_read:>9,} bytes  {old_time * 1e3:7.3f} ms  {old_stats}")
+        print(f"  stream: read {new_read:>9,} bytes  {new_time * 1e3:7.3f} ms  {new_stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
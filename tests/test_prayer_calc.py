@@ -0,0 +1,39 @@
+import datetime
+import math
+import random
+
+import pytest
+
+from utils import prayer_calc
+
+
+def to_minutes(timing):
+    hour, minute = map(int, timing.split(':'))
+    return hour * 60 + minute
+
+
+def test_scalar_and_numpy_paths_agree():
+    np = pytest.importorskip("numpy")
+    rng = random.Random(4)
+
+    for _ in range(300):
+        latitude = rng.uniform(-65, 65)
+        longitude = rng.uniform(-180, 180)
+        date = datetime.date(2026, 1, 1) + datetime.timedelta(days=rng.randrange(365))
+        utc_offset = rng.choice([-5, 0, 1, 2, 5.5, 9])
+        method = rng.choice(list(prayer_calc.METHODS))
+
+        scalar = prayer_calc.prayer_times(latitude, longitude, date, utc_offset, method)
+        table = prayer_calc.prayer_times_table([latitude], [longitude], [date], utc_offset, method)[0, 0]
+        for column, prayer in enumerate(prayer_calc.TIMINGS):
+            if scalar[prayer] is None:
+                assert math.isnan(table[column]), (latitude, longitude, date, prayer)
+            else:
+                assert to_minutes(scalar[prayer]) == table[column], (latitude, longitude, date, prayer)
+
+
+def test_polar_day_has_no_sunrise():
+    # Longyearbyen at midsummer, the sun never sets
+    timings = prayer_calc.prayer_times(78.2232, 15.6267, datetime.date(2026, 6, 21), 2)
+    assert timings["Sunrise"] is None
+    assert timings["Sunset"] is None
@@ -0,0 +1,104 @@
+import random
+
+from cogs.TikTokTracker import TikTokGoal
+
+
+class BaselineGoal:
+    """Milestone tracking as it was before the bisect / bitset rewrite, kept as the reference"""
+
+    def __init__(self, milestones):
+        self.milestones = sorted(milestones)
+        self.current_milestone_index = -1
+        self.completed_milestones = []
+
+    def update_progress(self, current_value):
+        newly_achieved = []
+        for i, milestone in enumerate(self.milestones):
+            if current_value >= milestone and milestone not in self.completed_milestones:
+                self.current_milestone_index = i
+                self.completed_milestones.append(milestone)
+                newly_achieved.append(milestone)
+        return newly_achieved
+
+    def get_current_milestone(self):
+        return self.milestones[self.current_milestone_index] if self.current_milestone_index >= 0 else 0
+
+    def get_next_milestone(self):
+        if self.current_milestone_index >= len(self.milestones) - 1:
+            return None
+        return self.milestones[self.current_milestone_index + 1]
+
+    def is_completed(self):
+        return self.current_milestone_index >= len(self.milestones) - 1
+
+
+def random_values(rng, top, count):
+    # Mostly growth with the odd drop, as real follower counts move
+    value = rng.randrange(top // 10 + 1)
+    values = []
+    for _ in range(count):
+        if rng.random() < 0.2:
+            value = max(0, value - rng.randrange(top // 5 + 1))
+        else:
+            value += rng.randrange(top // 8 + 1)
+        values.append(value)
+    return values
+
+
+def assert_same_state(goal, baseline, context):
+    assert goal.current_milestone_index == baseline.current_milestone_index, context
+    assert goal.get_current_milestone() == baseline.get_current_milestone(), context
+    assert goal.get_next_milestone() == baseline.get_next_milestone(), context
+    assert goal.completed_milestones == sorted(baseline.completed_milestones), context
+    assert goal.is_completed() == baseline.is_completed(), context
+
+
+def test_matches_baseline_on_random_ladders():
+    rng = random.Random(18)
+    for case in range(2000):
+        top = rng.choice([100, 10_000, 5_000_000])
+        milestones = rng.sample(range(1, top), rng.randint(1, 40))
+        goal = TikTokGoal("Followers Milestones", "followers", milestones)
+        baseline = BaselineGoal(milestones)
+
+        for value in random_values(rng, top, rng.randint(1, 30)):
+            context = (case, milestones, value)
+            assert goal.update_progress(value) == baseline.update_progress(value), context
+            assert_same_state(goal, baseline, context)
+
+        # Saved and restored goals carry on exactly where they were
+        restored = TikTokGoal.from_dict(goal.to_dict())
+        assert_same_state(restored, baseline, (case, milestones))
+
+
+def test_matches_baseline_on_evenly_spaced_ladders():
+    rng = random.Random(180)
+    for case in range(200):
+        step = rng.choice([1, 10, 1000])
+        maximum = step * rng.randint(1, 500)
+        goal = TikTokGoal.ladder("Likes Milestones", "likes", step, maximum)
+        baseline = BaselineGoal(range(step, maximum + 1, step))
+
+        for value in random_values(rng, maximum, 20):
+            context = (case, step, maximum, value)
+            assert goal.update_progress(value) == baseline.update_progress(value), context
+            assert_same_state(goal, baseline, context)
+
+
+def test_duplicate_milestones_are_merged():
+    # Intentional difference: the baseline kept duplicates, so its indexes counted them and
+    # get_next_milestone could return a milestone that was already reached. The ladder is
+    # now de-duplicated; the milestones reached and announced are unchanged.
+    milestones = [26, 7, 7, 76]
+    goal = TikTokGoal("Followers Milestones", "followers", milestones)
+    baseline = BaselineGoal(milestones)
+
+    assert goal.update_progress(10) == baseline.update_progress(10) == [7]
+    assert baseline.get_next_milestone() == 7
+    assert goal.get_next_milestone() == 26
+
+    assert goal.update_progress(30) == baseline.update_progress(30) == [26]
+    assert baseline.current_milestone_index == 2
+    assert goal.current_milestone_index == 1
+    assert goal.get_current_milestone() == baseline.get_current_milestone() == 26
+    assert goal.get_next_milestone() == baseline.get_next_milestone() == 76
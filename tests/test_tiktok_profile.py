@@ -0,0 +1,124 @@
+import asyncio
+import os
+
+import pytest
+
+from utils import tiktok_profile
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+class FakeContent:
+    """Stands in for an aiohttp StreamReader, handing out the page in fixed pieces"""
+
+    def __init__(self, data, splits=None, chunk_size=tiktok_profile.CHUNK_SIZE):
+        if splits is None:
+            splits = range(chunk_size, len(data), chunk_size)
+        bounds = [0, *splits, len(data)]
+        self.chunks = [data[start:end] for start, end in zip(bounds, bounds[1:])]
+        self.chunks_read = 0
+
+    async def iter_chunked(self, size):
+        for chunk in self.chunks:
+            self.chunks_read += 1
+            yield chunk
+
+
+def read_blob(content, **kwargs):
+    return asyncio.run(tiktok_profile.read_state_blob(content, **kwargs))
+
+
+def test_universal_layout_stops_after_the_blob():
+    page = load_fixture("tiktok_universal.html")
+    content = FakeContent(page)
+    blob, bytes_read = read_blob(content)
+
+    assert tiktok_profile.extract_stats(blob) == {"followers": 1_200_000, "likes": 12_345}
+    assert page.index(blob) + len(blob) <= bytes_read < len(page)
+    assert content.chunks_read < len(content.chunks)
+
+
+def test_sigi_state_layout():
+    blob, _ = read_blob(FakeContent(load_fixture("tiktok_sigi.html")))
+
+    # Counts in the older layout can be strings, "1.15M" must not come out as 1149999
+    assert tiktok_profile.extract_stats(blob) == {"followers": 1_150_000, "likes": 12_345}
+
+
+@pytest.mark.parametrize("name", ["tiktok_universal.html", "tiktok_sigi.html"])
+def test_marker_split_across_chunks(name):
+    page = load_fixture(name)
+    expected, _ = read_blob(FakeContent(page))
+
+    # Split the page inside the script tag marker, and again inside the closing tag
+    tag = next(page.find(marker) for marker in tiktok_profile.STATE_SCRIPTS if marker in page)
+    end = page.index(tiktok_profile.SCRIPT_END, tag)
+    for offset in range(1, 12):
+        splits = [tag + offset, end + offset % len(tiktok_profile.SCRIPT_END)]
+        blob, _ = read_blob(FakeContent(page, splits))
+        assert blob == expected, offset
+
+
+def test_one_byte_chunks():
+    page = load_fixture("tiktok_universal.html")
+    expected, _ = read_blob(FakeContent(page))
+    tag = page.index(tiktok_profile.STATE_SCRIPTS[0])
+
+    # Everything from just before the tag arrives a byte at a time
+    blob, _ = read_blob(FakeContent(page, range(tag - 20, len(page))))
+    assert blob == expected
+
+
+def test_missing_blob_reads_the_whole_page():
+    page = load_fixture("tiktok_no_state.html")
+    blob, bytes_read = read_blob(FakeContent(page))
+
+    assert blob is None
+    assert bytes_read == len(page)
+
+
+def test_max_bytes_cutoff():
+    page = load_fixture("tiktok_no_state.html")
+    content = FakeContent(page)
+    blob, bytes_read = read_blob(content, max_bytes=40_000)
+
+    assert blob is None
+    assert 40_000 < bytes_read <= 40_000 + tiktok_profile.CHUNK_SIZE
+    assert content.chunks_read < len(content.chunks)
+
+
+def test_blob_past_max_bytes_is_not_read():
+    page = load_fixture("tiktok_universal.html")
+    tag = page.index(tiktok_profile.STATE_SCRIPTS[0])
+    blob, _ = read_blob(FakeContent(page), max_bytes=tag - 2 * tiktok_profile.CHUNK_SIZE)
+
+    assert blob is None
+
+
+def test_extract_stats_rejects_other_json():
+    assert tiktok_profile.extract_stats(b'{"AppContext": {}}') is None
+    assert tiktok_profile.extract_stats(b'not json') is None
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1.2M", 1_200_000),
+    ("12,345", 12_345),
+    ("1.15M", 1_150_000),
+    ("3.4k", 3_400),
+    ("2B", 2_000_000_000),
+    (" 987 ", 987),
+    (1234, 1234),
+    (12.0, 12),
+])
+def test_parse_count(value, expected):
+    assert tiktok_profile.parse_count(value) == expected
+
+
+@pytest.mark.parametrize("value", ["abc", "", "1.2X", "-5", None, True, [1]])
+def test_parse_count_rejects(value):
+    assert tiktok_profile.parse_count(value) is None
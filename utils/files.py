@@ -0,0 +1,11 @@
+import os
+
+
+def write_atomic(path, text):
+    """Replace a file with text so readers only ever see the old or the new version"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
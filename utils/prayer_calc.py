@@ -0,0 +1,165 @@
+import datetime
+import math
+
+# Calculation methods, keyed by their Aladhan API method number
+METHODS = {
+    1: {"name": "University of Islamic Sciences, Karachi", "fajr": 18, "isha": 18},
+    2: {"name": "Islamic Society of North America", "fajr": 15, "isha": 15},
+    3: {"name": "Muslim World League", "fajr": 18, "isha": 17},
+    4: {"name": "Umm Al-Qura University, Makkah", "fajr": 18.5, "isha_minutes": 90},
+    5: {"name": "Egyptian General Authority of Survey", "fajr": 19.5, "isha": 17.5},
+}
+
+# Column order of every result produced by this module
+TIMINGS = ("Fajr", "Sunrise", "Dhuhr", "Asr", "Sunset", "Maghrib", "Isha")
+
+SUN_ALTITUDE = 0.833  # Refraction plus solar radius at sunrise and sunset
+ASR_SHADOW_FACTOR = 1  # Standard (Shafi'i) Asr
+
+# Plain multipliers instead of math.radians/degrees, which only accept scalars
+RAD = math.pi / 180
+DEG = 180 / math.pi
+
+
+# Scalar math with the same names as NumPy, so one implementation serves both backends
+class _ScalarOps:
+    sin = staticmethod(math.sin)
+    cos = staticmethod(math.cos)
+    tan = staticmethod(math.tan)
+    arcsin = staticmethod(math.asin)
+    arctan = staticmethod(math.atan)
+    arctan2 = staticmethod(math.atan2)
+    isnan = staticmethod(math.isnan)
+
+    @staticmethod
+    def arccos(x):
+        # The sun never reaches the angle on this day
+        return math.acos(x) if -1 <= x <= 1 else math.nan
+
+    @staticmethod
+    def mod(a, b):
+        return a % b
+
+    @staticmethod
+    def where(condition, a, b):
+        return a if condition else b
+
+
+def _sun_position(ops, jd):
+    """Return the solar declination (degrees) and equation of time (hours)"""
+    d = jd - 2451545.0
+    g = ops.mod(357.529 + 0.98560028 * d, 360)
+    q = ops.mod(280.459 + 0.98564736 * d, 360)
+    ecliptic_longitude = RAD * ops.mod(
+        q + 1.915 * ops.sin(RAD * g) + 0.020 * ops.sin(2 * RAD * g), 360
+    )
+    obliquity = RAD * (23.439 - 0.00000036 * d)
+
+    right_ascension = ops.mod(DEG * ops.arctan2(
+        ops.cos(obliquity) * ops.sin(ecliptic_longitude), ops.cos(ecliptic_longitude)
+    ) / 15, 24)
+    equation_of_time = q / 15 - right_ascension
+    declination = DEG * ops.arcsin(ops.sin(obliquity) * ops.sin(ecliptic_longitude))
+    return declination, equation_of_time
+
+
+def _mid_day(ops, jd, day_portion):
+    _, equation_of_time = _sun_position(ops, jd + day_portion)
+    return ops.mod(12 - equation_of_time, 24)
+
+
+def _sun_angle_time(ops, latitude, jd, angle, day_portion, before_noon=False):
+    """Hours (local solar time) at which the sun is `angle` degrees below the horizon"""
+    declination, _ = _sun_position(ops, jd + day_portion)
+    noon = _mid_day(ops, jd, day_portion)
+    lat, decl = RAD * latitude, RAD * declination
+    hour_angle = DEG * ops.arccos(
+        (-ops.sin(RAD * angle) - ops.sin(decl) * ops.sin(lat)) / (ops.cos(decl) * ops.cos(lat))
+    ) / 15
+    return noon - hour_angle if before_noon else noon + hour_angle
+
+
+def _asr_time(ops, latitude, jd, day_portion):
+    declination, _ = _sun_position(ops, jd + day_portion)
+    shadow = ASR_SHADOW_FACTOR + ops.tan(RAD * abs(latitude - declination))
+    angle = -DEG * ops.arctan(1 / shadow)
+    return _sun_angle_time(ops, latitude, jd, angle, day_portion)
+
+
+def _compute(ops, latitude, longitude, jd, utc_offset, method):
+    """Compute every timing in hours after local midnight, following the Aladhan/PrayTimes algorithm"""
+    params = METHODS[method]
+    jd = jd - longitude / (15 * 24)
+
+    # A single refinement pass starting from rough day portions is enough for minute accuracy
+    fajr = _sun_angle_time(ops, latitude, jd, params["fajr"], 5 / 24, before_noon=True)
+    sunrise = _sun_angle_time(ops, latitude, jd, SUN_ALTITUDE, 6 / 24, before_noon=True)
+    dhuhr = _mid_day(ops, jd, 12 / 24)
+    asr = _asr_time(ops, latitude, jd, 13 / 24)
+    sunset = _sun_angle_time(ops, latitude, jd, SUN_ALTITUDE, 18 / 24)
+
+    # Shift from local solar time to the requested UTC offset
+    shift = utc_offset - longitude / 15
+    fajr, sunrise, dhuhr, asr, sunset = (t + shift for t in (fajr, sunrise, dhuhr, asr, sunset))
+
+    # Angle-based adjustment for high latitudes, where twilight may never end
+    night = ops.mod(sunrise - sunset, 24)
+    fajr_portion = params["fajr"] / 60 * night
+    fajr = ops.where(
+        ops.isnan(fajr) | (ops.mod(sunrise - fajr, 24) > fajr_portion), sunrise - fajr_portion, fajr
+    )
+
+    if "isha_minutes" in params:
+        isha = sunset + params["isha_minutes"] / 60
+    else:
+        isha = _sun_angle_time(ops, latitude, jd, params["isha"], 18 / 24) + shift
+        isha_portion = params["isha"] / 60 * night
+        isha = ops.where(
+            ops.isnan(isha) | (ops.mod(isha - sunset, 24) > isha_portion), sunset + isha_portion, isha
+        )
+
+    # Maghrib is sunset for every supported method
+    return fajr, sunrise, dhuhr, asr, sunset, sunset, isha
+
+
+def prayer_times(latitude: float, longitude: float, date: datetime.date, utc_offset: float,
+                 method: int = 3) -> dict:
+    """Compute one day's timings as "HH:MM" strings, in the same shape as the Aladhan API
+
+    `utc_offset` is in hours and should be the zone's offset on that date. Timings the sun
+    never reaches (polar day or night) are None.
+    """
+    jd = date.toordinal() + 1721424.5
+    timings = {}
+    for name, hours in zip(TIMINGS, _compute(_ScalarOps, latitude, longitude, jd, utc_offset, method)):
+        if math.isnan(hours):
+            timings[name] = None
+            continue
+        minutes = math.floor((hours % 24) * 60 + 0.5) % 1440
+        timings[name] = f"{minutes // 60:02d}:{minutes % 60:02d}"
+    return timings
+
+
+def prayer_times_table(latitudes, longitudes, dates, utc_offsets, method: int = 3):
+    """Compute timings for many cities and days in one vectorized NumPy call
+
+    `latitudes` and `longitudes` have one entry per city, `dates` one entry per day
+    (datetime.date or numpy.datetime64) and `utc_offsets` (hours) must broadcast to
+    (cities, days). Returns a float array of shape (cities, days, len(TIMINGS)) holding
+    minutes after local midnight, with NaN where the sun never reaches the angle.
+
+    A whole year for every city: dates = numpy.arange("2026-01-01", "2027-01-01", dtype="datetime64[D]")
+    """
+    import numpy as np
+
+    latitudes = np.asarray(latitudes, dtype=float)[:, None]
+    longitudes = np.asarray(longitudes, dtype=float)[:, None]
+    days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+    jd = days[None, :] + 2440587.5  # Julian date of 1970-01-01 at midnight
+    utc_offsets = np.broadcast_to(np.asarray(utc_offsets, dtype=float), (latitudes.shape[0], days.shape[0]))
+
+    with np.errstate(invalid="ignore"):
+        hours = np.stack(
+            np.broadcast_arrays(*_compute(np, latitudes, longitudes, jd, utc_offsets, method)), axis=-1
+        )
+        return np.mod(np.floor(np.mod(hours, 24) * 60 + 0.5), 1440)
@@ -0,0 +1,142 @@
+import mmap
+import os
+import struct
+
+# One sample: unix timestamp, followers, likes
+RECORD = struct.Struct('<qqq')
+FIELDS = 3
+
+# Resolution name -> bucket size in seconds (None keeps every change)
+RESOLUTIONS = {"raw": None, "hourly": 3600, "daily": 86400}
+
+
+class StatsHistory:
+    """Append-only per-account stats history, with hourly and daily rollups
+
+    Every account has one file per resolution holding fixed-width RECORDs in time order.
+    Raw files get a record whenever the counts change. Rollup files hold the last sample
+    of each bucket, so their newest record is rewritten in place until its bucket closes.
+    Reads memory-map the file and binary search the timestamps, so a window never loads
+    more than the records it returns.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.latest = {}  # username -> newest raw record, to skip unchanged samples
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_path(self, username, resolution):
+        suffix = "" if resolution == "raw" else f".{resolution}"
+        return os.path.join(self.directory, f"{username}{suffix}.bin")
+
+    def get_latest(self, username):
+        """Newest raw record as (timestamp, followers, likes), or None"""
+        if username not in self.latest:
+            records = self.read_tail(username, "raw", 1)
+            self.latest[username] = records[0] if records else None
+        return self.latest[username]
+
+    def append(self, username, timestamp, followers, likes):
+        record = (int(timestamp), followers, likes)
+        latest = self.get_latest(username)
+        if latest is None or latest[1:] != record[1:]:
+            with open(self.get_path(username, "raw"), 'ab') as f:
+                size = f.tell()
+                if size % RECORD.size:
+                    # Drop a torn trailing record, or every later record would be misaligned
+                    f.truncate(size - size % RECORD.size)
+                f.write(RECORD.pack(*record))
+            self.latest[username] = record
+
+        for resolution, bucket in RESOLUTIONS.items():
+            if bucket is not None:
+                self._roll_up(self.get_path(username, resolution), bucket, record)
+
+    @staticmethod
+    def _roll_up(path, bucket, record):
+        with open(path, 'a+b') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell() - f.tell() % RECORD.size  # Ignore a torn trailing record
+            if size:
+                f.seek(size - RECORD.size)
+                last = RECORD.unpack(f.read(RECORD.size))
+                if last[0] // bucket == record[0] // bucket:
+                    # Same bucket: the newest sample replaces the last one
+                    size -= RECORD.size
+            f.truncate(size)
+            f.seek(size)
+            f.write(RECORD.pack(*record))
+
+    def _map(self, username, resolution):
+        """Memory-map a history file as a flat int64 view, or None when it is empty"""
+        path = self.get_path(username, resolution)
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                size -= size % RECORD.size
+                if not size:
+                    return None
+                mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        return mapped
+
+    @staticmethod
+    def _record(values, index):
+        # Index the view directly; a slice would be another export that keeps the mmap open
+        offset = index * FIELDS
+        return values[offset], values[offset + 1], values[offset + 2]
+
+    @staticmethod
+    def _bisect(values, count, timestamp):
+        # First record whose timestamp is >= timestamp
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if values[middle * FIELDS] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def read_tail(self, username, resolution, count):
+        mapped = self._map(username, resolution)
+        if mapped is None:
+            return []
+        # The native 'q' view matches the little-endian records on every platform we run on
+        with mapped, memoryview(mapped) as view, view.cast('q') as values:
+            total = len(values) // FIELDS
+            return [self._record(values, i) for i in range(max(0, total - count), total)]
+
+    def window(self, username, start, end, resolution="raw", max_points=None):
+        """Records with start <= timestamp <= end, evenly thinned to at most max_points
+
+        The last record in the window is always included, so growth over the window can be
+        read off the first and last points.
+        """
+        mapped = self._map(username, resolution)
+        if mapped is None:
+            return []
+        with mapped, memoryview(mapped) as view, view.cast('q') as values:
+            total = len(values) // FIELDS
+            first = self._bisect(values, total, start)
+            last = self._bisect(values, total, end + 1)
+            count = last - first
+            if count <= 0:
+                return []
+
+            if max_points and count > max_points:
+                step = (count - 1) / (max_points - 1)
+                indexes = [first + round(i * step) for i in range(max_points)]
+            else:
+                indexes = range(first, last)
+            return [self._record(values, i) for i in indexes]
+
+    @staticmethod
+    def pick_resolution(seconds):
+        """Coarsest resolution that still gives a useful number of points for a window"""
+        if seconds > 14 * 86400:
+            return "daily"
+        if seconds > 2 * 86400:
+            return "hourly"
+        return "raw"
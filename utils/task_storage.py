@@ -0,0 +1,456 @@
+import asyncio
+import glob
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.files import write_atomic
+
+
+def new_channel():
+    return {
+        "tasks": [],
+        "days": 0,
+        "setup_mode": False,
+        "daily_tasks": {},
+        "current_day": 0,
+        "start_date": None,
+        "next_id": 1
+    }
+
+
+def repair_task_ids(channel):
+    """Make every task id in a channel unique and move next_id past all of them
+
+    Lists saved before ids were allocated per channel reused len(tasks) + 1 after a removal,
+    so two tasks could share an id. The first keeps it, since lookups always resolved the id
+    to that one. Later ones get fresh ids, and because tasks are distributed in list order,
+    later occurrences of the id in the schedule move to them. Returns True if anything changed.
+    """
+    tasks = channel.setdefault("tasks", [])
+    next_id = max([channel.get("next_id", 1)] + [task["id"] + 1 for task in tasks])
+    changed = channel.get("next_id") != next_id
+
+    seen = set()
+    renumbered = {}  # duplicated id -> fresh ids given to its later copies, in list order
+    for task in tasks:
+        if task["id"] in seen:
+            renumbered.setdefault(task["id"], []).append(next_id)
+            task["id"] = next_id
+            next_id += 1
+            changed = True
+        seen.add(task["id"])
+
+    scheduled = set()
+    daily_tasks = channel.get("daily_tasks", {})
+    for day in sorted(daily_tasks, key=lambda day: int(day[3:])):
+        for position, task_id in enumerate(daily_tasks[day]):
+            if task_id in scheduled and renumbered.get(task_id):
+                daily_tasks[day][position] = renumbered[task_id].pop(0)
+            scheduled.add(task_id)
+
+    channel["next_id"] = next_id
+    return changed
+
+
+def apply_op(tasks_data, op):
+    """Apply one op-log entry to the tasks data, the same way the cog made the change"""
+    channel_id, kind = op["ch"], op["op"]
+    if kind == "reset":
+        # Ids keep counting across a reset, as they do in the cog
+        channel = new_channel()
+        channel["next_id"] = tasks_data.get(channel_id, channel).get("next_id", 1)
+        tasks_data[channel_id] = channel
+        return
+    if kind == "repair":
+        tasks_data[channel_id] = op["channel"]
+        return
+
+    channel = tasks_data.setdefault(channel_id, new_channel())
+    if kind == "setup":
+        channel["setup_mode"] = True
+    elif kind == "add":
+        channel["tasks"].append(dict(op["task"]))
+        channel["next_id"] = max(channel.get("next_id", 1), op["task"]["id"] + 1)
+    elif kind == "remove":
+        task = next((t for t in channel["tasks"] if t["id"] == op["id"]), None)
+        if task:
+            channel["tasks"].remove(task)
+    elif kind == "days":
+        channel["days"] = op["days"]
+        channel["setup_mode"] = False
+    elif kind == "distribute":
+        channel["daily_tasks"] = op["daily_tasks"]
+        channel["current_day"] = 1
+        channel["start_date"] = op["start_date"]
+    elif kind == "advance":
+        channel["current_day"] = op["day"]
+    elif kind == "complete":
+        ids = set(op["ids"])
+        for task in channel["tasks"]:
+            if task["id"] in ids:
+                task["completed"] = op["completed"]
+    else:
+        raise ValueError(f"Unknown task op: {kind}")
+
+
+class TaskStorage:
+    """Where the task cog keeps its data
+
+    Backends implement `load`, which returns the whole {channel id: channel data} dict, and
+    `write`, which is given {channel id: channel data or None for deleted} plus the op-log
+    entries describing those changes, and persists whichever of the two it stores. Writes
+    run on one worker thread, in submission order, so the event loop never waits on disk.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="task-storage")
+
+    def load(self):
+        raise NotImplementedError
+
+    def write(self, changes, ops):
+        raise NotImplementedError
+
+    async def save(self, changes, ops=()):
+        # Serialize on the loop so later mutations can't leak into the write
+        changes, ops = json.loads(json.dumps([changes, list(ops)]))
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.write, changes, ops)
+
+    def read_history(self, channel_id, limit):
+        """Newest op-log entries for a channel, for backends that keep one"""
+        return None
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+class JsonTaskStorage(TaskStorage):
+    """The original tasks.json file, now replaced atomically on every write"""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.data = {}
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                self.data = json.load(f)
+        except FileNotFoundError:
+            self.data = {}
+        except ValueError as e:
+            print(f"Could not read {self.path}: {e}")
+            self.data = {}
+        return json.loads(json.dumps(self.data))
+
+    def write(self, changes, ops=()):
+        for channel_id, channel_data in changes.items():
+            if channel_data is None:
+                self.data.pop(channel_id, None)
+            else:
+                self.data[channel_id] = channel_data
+        write_atomic(self.path, json.dumps(self.data, indent=4))
+
+
+class SqliteTaskStorage(TaskStorage):
+    """One row per channel and one row per task, in a WAL-mode SQLite database
+
+    Each write diffs the channels it is given against what was last stored and only
+    touches the rows that changed, inside a single transaction.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS channels (
+            channel_id TEXT PRIMARY KEY,
+            days INTEGER NOT NULL,
+            setup_mode INTEGER NOT NULL,
+            daily_tasks TEXT NOT NULL,
+            current_day INTEGER NOT NULL,
+            start_date TEXT,
+            next_id INTEGER NOT NULL DEFAULT 1
+        );
+        CREATE TABLE IF NOT EXISTS tasks (
+            channel_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            completed INTEGER NOT NULL,
+            PRIMARY KEY (channel_id, position)
+        );
+    """
+
+    def __init__(self, path, migrate_from=None):
+        super().__init__()
+        self.path = path
+        self.migrate_from = migrate_from  # Legacy tasks.json imported on first load
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(self.SCHEMA)
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(channels)")]
+        if "next_id" not in columns:
+            # Databases created before ids were allocated per channel; load repairs the values
+            self.connection.execute("ALTER TABLE channels ADD COLUMN next_id INTEGER NOT NULL DEFAULT 1")
+        self.stored = {}  # channel id -> (channel row, [task rows]) as last written
+
+    @staticmethod
+    def to_rows(channel_id, channel_data):
+        channel_row = (
+            channel_id,
+            channel_data.get("days", 0),
+            int(channel_data.get("setup_mode", False)),
+            json.dumps(channel_data.get("daily_tasks", {})),
+            channel_data.get("current_day", 0),
+            channel_data.get("start_date"),
+            channel_data.get("next_id", 1)
+        )
+        task_rows = [
+            (channel_id, position, task["id"], task["name"], int(task["completed"]))
+            for position, task in enumerate(channel_data.get("tasks", []))
+        ]
+        return channel_row, task_rows
+
+    def load(self):
+        data = {}
+        for channel_id, days, setup_mode, daily_tasks, current_day, start_date, next_id in self.connection.execute(
+            "SELECT channel_id, days, setup_mode, daily_tasks, current_day, start_date, next_id FROM channels"
+        ):
+            data[channel_id] = {
+                "tasks": [],
+                "days": days,
+                "setup_mode": bool(setup_mode),
+                "daily_tasks": json.loads(daily_tasks),
+                "current_day": current_day,
+                "start_date": start_date,
+                "next_id": next_id
+            }
+        for channel_id, task_id, name, completed in self.connection.execute(
+            "SELECT channel_id, id, name, completed FROM tasks ORDER BY channel_id, position"
+        ):
+            if channel_id in data:
+                data[channel_id]["tasks"].append({"name": name, "completed": bool(completed), "id": task_id})
+
+        self.stored = {channel_id: self.to_rows(channel_id, channel_data) for channel_id, channel_data in data.items()}
+
+        if not data and self.migrate_from and os.path.exists(self.migrate_from):
+            data = self.migrate()
+        return data
+
+    def migrate(self):
+        """Import the legacy JSON file once, then move it aside so it is never imported twice"""
+        legacy = JsonTaskStorage(self.migrate_from).load()
+        self.write(legacy, ())
+        os.replace(self.migrate_from, f"{self.migrate_from}.migrated")
+        print(f"Migrated {len(legacy)} channels from {self.migrate_from} to {self.path}")
+        return legacy
+
+    def write(self, changes, ops=()):
+        with self.connection:
+            for channel_id, channel_data in changes.items():
+                old_channel_row, old_task_rows = self.stored.get(channel_id, (None, []))
+
+                if channel_data is None:
+                    self.connection.execute("DELETE FROM channels WHERE channel_id = ?", (channel_id,))
+                    self.connection.execute("DELETE FROM tasks WHERE channel_id = ?", (channel_id,))
+                    self.stored.pop(channel_id, None)
+                    continue
+
+                channel_row, task_rows = self.to_rows(channel_id, channel_data)
+                if channel_row != old_channel_row:
+                    self.connection.execute("INSERT OR REPLACE INTO channels VALUES (?, ?, ?, ?, ?, ?, ?)", channel_row)
+
+                changed = [row for position, row in enumerate(task_rows)
+                           if position >= len(old_task_rows) or old_task_rows[position] != row]
+                if changed:
+                    self.connection.executemany("INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?)", changed)
+                if len(task_rows) < len(old_task_rows):
+                    self.connection.execute(
+                        "DELETE FROM tasks WHERE channel_id = ? AND position >= ?", (channel_id, len(task_rows))
+                    )
+                self.stored[channel_id] = (channel_row, task_rows)
+
+    def close(self):
+        super().close()
+        self.connection.close()
+
+
+class OpLogTaskStorage(TaskStorage):
+    """A snapshot plus an append-only log of every change since it
+
+    Each write appends one compact JSON line per op, so a mutation costs O(1) I/O however
+    large the data is. Every `compact_every` ops the replayed state is folded into a new
+    snapshot and the log is moved aside as an archived segment, which keeps the full audit
+    history of who changed what and when without ever being replayed again.
+    """
+
+    def __init__(self, snapshot_path, log_path, migrate_from=None, compact_every=1000):
+        super().__init__()
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path
+        self.migrate_from = migrate_from  # Legacy tasks.json used as the first snapshot
+        self.compact_every = compact_every
+        self.state = {}
+        self.seq = 0  # Sequence number of the last op applied
+        self.snapshot_seq = 0
+
+    def load(self):
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r') as f:
+                snapshot = json.load(f)
+            self.state, self.seq = snapshot["channels"], snapshot["seq"]
+        elif self.migrate_from and os.path.exists(self.migrate_from):
+            self.state = JsonTaskStorage(self.migrate_from).load()
+            write_atomic(self.snapshot_path, json.dumps({"seq": 0, "channels": self.state}))
+            os.replace(self.migrate_from, f"{self.migrate_from}.migrated")
+            print(f"Migrated {len(self.state)} channels from {self.migrate_from} to {self.snapshot_path}")
+        self.snapshot_seq = self.seq
+
+        # Replay the tail. A torn last line from a crash mid-append is cut off, so the next
+        # append starts on a clean line
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'r+b') as f:
+                good = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("torn line")
+                        op = json.loads(line)
+                    except ValueError:
+                        f.truncate(good)
+                        break
+                    good += len(line)
+                    if op["seq"] > self.seq:
+                        apply_op(self.state, op)
+                        self.seq = op["seq"]
+        return json.loads(json.dumps(self.state))
+
+    def write(self, changes, ops):
+        if not ops:
+            return
+        lines = []
+        for seq, op in enumerate(ops, self.seq + 1):
+            op["seq"] = seq
+            lines.append(json.dumps(op, separators=(',', ':')).encode() + b"\n")
+
+        # Unbuffered, so a failed append can be cut off exactly. State and seq only move once
+        # the ops are durable, which lets the write-behind retry the same ops after a failure
+        with open(self.log_path, 'ab', buffering=0) as f:
+            start = f.tell()
+            try:
+                f.write(b"".join(lines))
+                os.fsync(f.fileno())
+            except BaseException:
+                os.ftruncate(f.fileno(), start)
+                raise
+        for op in ops:
+            apply_op(self.state, op)
+        self.seq += len(ops)
+
+        if self.seq - self.snapshot_seq >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        # The snapshot records the last seq it includes, so a crash before the log is moved
+        # aside only means those ops are skipped on replay
+        write_atomic(self.snapshot_path, json.dumps({"seq": self.seq, "channels": self.state}))
+        if os.path.exists(self.log_path):
+            os.replace(self.log_path, f"{self.log_path}.{self.seq:012d}")
+        self.snapshot_seq = self.seq
+
+    def read_history(self, channel_id, limit):
+        # The live log, then archived segments newest first, until enough entries are found
+        paths = [self.log_path] + sorted(glob.glob(f"{glob.escape(self.log_path)}.*"), reverse=True)
+        history = []
+        for path in paths:
+            try:
+                with open(path, 'r') as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                continue
+            for line in reversed(lines):
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    continue
+                if op["ch"] == channel_id:
+                    history.append(op)
+                    if len(history) >= limit:
+                        return history
+        return history
+
+
+class WriteBehind:
+    """Coalesces bursts of task mutations into at most one storage write per interval
+
+    Mutations only queue their op-log entry and mark their channel dirty. A flush task waits
+    `interval` seconds, then hands every dirty channel and queued op to the storage in one
+    write, repeating while more changes arrived in the meantime. Flushes run one at a time,
+    so a failed write can put its ops back ahead of newer ones. `close` lets a write in
+    progress finish, then flushes whatever is left.
+    """
+
+    def __init__(self, storage, get_channel, interval=2.0):
+        self.storage = storage
+        self.get_channel = get_channel  # channel id -> current channel data, or None once deleted
+        self.interval = interval
+        self.dirty = set()
+        self.ops = []
+        self.flusher = None
+        self.lock = asyncio.Lock()
+        self.closing = asyncio.Event()
+        self.writes = 0
+
+    def record(self, channel_id, op):
+        op["ch"] = channel_id
+        self.ops.append(op)
+        self.mark_dirty(channel_id)
+
+    def mark_dirty(self, channel_id):
+        self.dirty.add(str(channel_id))
+        if self.flusher is None or self.flusher.done():
+            self.flusher = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        while self.dirty and not self.closing.is_set():
+            try:
+                # close() wakes this early for a last flush
+                await asyncio.wait_for(self.closing.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def flush(self):
+        async with self.lock:
+            if not self.dirty:
+                return
+            dirty, self.dirty = self.dirty, set()
+            ops, self.ops = self.ops, []
+            try:
+                await self.storage.save({channel_id: self.get_channel(channel_id) for channel_id in dirty}, ops)
+                self.writes += 1
+            except Exception as e:
+                # Keep the changes queued, ahead of any recorded since, so the next flush retries them
+                print(f"Error saving tasks: {e}")
+                self.dirty |= dirty
+                self.ops[:0] = ops
+
+    async def close(self):
+        # Wait for the flusher rather than cancel it: a cancelled write would drop the changes it took
+        self.closing.set()
+        if self.flusher:
+            await self.flusher
+        await self.flush()
+
+
+def open_task_storage(backend, json_path='tasks.json', sqlite_path='tasks.db',
+                      snapshot_path='tasks.snapshot.json', log_path='tasks.oplog'):
+    """Create the storage backend named by `backend`: sqlite, json or oplog"""
+    if backend == 'json':
+        return JsonTaskStorage(json_path)
+    if backend == 'sqlite':
+        return SqliteTaskStorage(sqlite_path, migrate_from=json_path)
+    if backend == 'oplog':
+        return OpLogTaskStorage(snapshot_path, log_path, migrate_from=json_path)
+    raise ValueError(f"Unknown task storage backend: {backend}")
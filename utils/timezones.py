@@ -0,0 +1,57 @@
+import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+EPOCH = datetime.date(1970, 1, 1)
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> ZoneInfo:
+    """Return the ZoneInfo for an IANA name, memoized so hot loops never parse it twice"""
+    return ZoneInfo(name)
+
+
+def is_valid_zone(name: str) -> bool:
+    try:
+        get_zone(name)
+        return True
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+
+
+@lru_cache(maxsize=65536)
+def day_offsets(name: str, date: datetime.date) -> tuple:
+    """UTC offsets in seconds at the start and at the end of a local date"""
+    zone = get_zone(name)
+    start = datetime.datetime(date.year, date.month, date.day, tzinfo=zone)
+    end = start + datetime.timedelta(hours=23, minutes=59)
+    return int(start.utcoffset().total_seconds()), int(end.utcoffset().total_seconds())
+
+
+def utc_offset(name: str, date: datetime.date) -> int:
+    """UTC offset in seconds at local noon, the offset in force for most of the day"""
+    zone = get_zone(name)
+    noon = datetime.datetime(date.year, date.month, date.day, 12, tzinfo=zone)
+    return int(noon.utcoffset().total_seconds())
+
+
+def local_to_timestamp(name: str, date: datetime.date, minutes: int) -> int:
+    """Unix timestamp of a wall-clock time, given as minutes after local midnight
+
+    Days without a DST change are pure arithmetic on the cached offset. On the few
+    transition days zoneinfo resolves the time, using the first occurrence of a
+    repeated hour and shifting a skipped one forward.
+    """
+    start_offset, end_offset = day_offsets(name, date)
+    local_seconds = (date - EPOCH).days * 86400 + minutes * 60
+    if start_offset == end_offset:
+        return local_seconds - start_offset
+
+    hour, minute = divmod(minutes, 60)
+    local = datetime.datetime(date.year, date.month, date.day, hour, minute, tzinfo=get_zone(name))
+    return int(local.timestamp())
+
+
+def local_date(name: str, timestamp: float) -> datetime.date:
+    """The calendar date in a zone at a Unix timestamp"""
+    return datetime.datetime.fromtimestamp(timestamp, get_zone(name)).date()
@@ -0,0 +1,111 @@
+import math
+from collections import deque
+
+DAY = 86400
+MAX_ETA_SECONDS = 10 * 365 * DAY  # Predictions further out than this are noise
+
+
+def _fit(n, sx, sy, sxx, sxy, syy):
+    """Least-squares line from running sums, as (intercept, slope, r squared)"""
+    sxx_centered = sxx - sx * sx / n
+    if sxx_centered <= 0:
+        return None
+    sxy_centered = sxy - sx * sy / n
+    syy_centered = syy - sy * sy / n
+    slope = sxy_centered / sxx_centered
+    intercept = (sy - slope * sx) / n
+    r_squared = 1.0 if syy_centered <= 0 else sxy_centered * sxy_centered / (sxx_centered * syy_centered)
+    return intercept, slope, r_squared
+
+
+class RollingTrend:
+    """Linear and exponential trends over a sliding time window, updated in O(1) per sample
+
+    Both fits are kept as running sums, so adding a sample or evicting an old one is a
+    handful of additions. Time is measured in days from the first sample to keep the sums
+    well conditioned, and the exponential fit works on log(value + 1) so zero counts are
+    allowed. Predictions use whichever model explains the window better.
+    """
+
+    def __init__(self, window_seconds: float, min_samples: int = 3, min_span_seconds: float = 3600):
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.min_span_seconds = min_span_seconds
+        self.origin = None
+        self.samples = deque()  # (days, value, log value)
+        self.updates_since_resum = 0
+        self._reset_sums()
+
+    def _reset_sums(self):
+        self.n = 0
+        self.sx = self.sxx = 0.0
+        self.sy = self.sxy = self.syy = 0.0
+        self.sl = self.sxl = self.sll = 0.0
+
+    def _accumulate(self, sample, sign):
+        x, y, l = sample
+        self.n += sign
+        self.sx += sign * x
+        self.sxx += sign * x * x
+        self.sy += sign * y
+        self.sxy += sign * x * y
+        self.syy += sign * y * y
+        self.sl += sign * l
+        self.sxl += sign * x * l
+        self.sll += sign * l * l
+
+    def add(self, timestamp: float, value: int):
+        if self.origin is None:
+            self.origin = timestamp
+        x = (timestamp - self.origin) / DAY
+        if self.samples and x <= self.samples[-1][0]:
+            return
+
+        sample = (x, float(value), math.log(value + 1))
+        self.samples.append(sample)
+        self._accumulate(sample, 1)
+
+        while self.samples and self.samples[0][0] < x - self.window_seconds / DAY:
+            self._accumulate(self.samples.popleft(), -1)
+
+        # Re-add the window now and then so floating-point drift from evictions can't build up
+        self.updates_since_resum += 1
+        if self.updates_since_resum > len(self.samples):
+            self._reset_sums()
+            for sample in self.samples:
+                self._accumulate(sample, 1)
+            self.updates_since_resum = 0
+
+    def fit(self):
+        """Best model as (kind, intercept, slope), with slope per day, or None while warming up"""
+        if self.n < self.min_samples or (self.samples[-1][0] - self.samples[0][0]) * DAY < self.min_span_seconds:
+            return None
+
+        linear = _fit(self.n, self.sx, self.sy, self.sxx, self.sxy, self.syy)
+        exponential = _fit(self.n, self.sx, self.sl, self.sxx, self.sxl, self.sll)
+        if linear is None:
+            return None
+        if exponential is not None and exponential[2] > linear[2]:
+            return "exponential", exponential[0], exponential[1]
+        return "linear", linear[0], linear[1]
+
+    def eta(self, target: int):
+        """Unix timestamp at which the trend reaches target, or None if it never will"""
+        model = self.fit()
+        if model is None:
+            return None
+        kind, intercept, slope = model
+        if slope <= 0:
+            return None
+
+        if kind == "exponential":
+            x = (math.log(target + 1) - intercept) / slope
+        else:
+            x = (target - intercept) / slope
+
+        # A target the trend line has already passed is due now
+        now = self.samples[-1][0]
+        x = max(x, now)
+        if (x - now) * DAY > MAX_ETA_SECONDS:
+            return None
+        return self.origin + x * DAY